@@ -1,494 +1,621 @@
 import streamlit as st
-import yt_dlp
-import re
-import requests
-import json
-from collections import Counter
 import time
+import os
+from functools import partial
+from contextlib import contextmanager
 
-# تحديد عنوان الصفحة
-st.set_page_config(page_title="YouTube Transcript Pro", page_icon="🎬", layout="wide")
-
-# العنوان الرئيسي
-st.title("🎬 YouTube Transcript Pro")
-st.markdown("**منصة شاملة لاستخراج وتحليل نصوص اليوتيوب - مجاني 100%**")
-
-# شرح التطبيق
-st.info("🚀 **مميزات جديدة:** استخراج + ترجمة + تلخيص + تحليل + بحث - كل شيء مجاني!")
-
-# دالة استخراج معرف الفيديو من الرابط
-def extract_video_id(youtube_url):
-    """استخراج معرف الفيديو من رابط اليوتيوب"""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\n?#]+)',
-        r'youtube\.com\/watch\?.*v=([^&\n?#]+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, youtube_url)
-        if match:
-            return match.group(1)
-    return None
-
-# دالة ترجمة النص (مجانية)
-def translate_text_free(text, target_lang='ar'):
-    """ترجمة النص باستخدام خدمة مجانية"""
-    try:
-        # قسم النص إلى أجزاء صغيرة
-        chunks = [text[i:i+4000] for i in range(0, len(text), 4000)]
-        translated_chunks = []
-        
-        for chunk in chunks:
-            # استخدام Google Translate المجاني
-            url = "https://translate.googleapis.com/translate_a/single"
-            params = {
-                'client': 'gtx',
-                'sl': 'auto',
-                'tl': target_lang,
-                'dt': 't',
-                'q': chunk
-            }
-            
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
-                    result = response.json()
-                    translated_text = ''.join([item[0] for item in result[0] if item[0]])
-                    translated_chunks.append(translated_text)
-                else:
-                    translated_chunks.append(chunk)  # احتفظ بالنص الأصلي
-            except:
-                translated_chunks.append(chunk)
-            
-            time.sleep(0.1)  # تجنب الحظر
-        
-        return ' '.join(translated_chunks)
-    except Exception as e:
-        return text  # إرجاع النص الأصلي في حالة الخطأ
+from transcript_core import (
+    BATCH_MAX_VIDEOS,
+    BATCH_MAX_WORKERS,
+    extract_video_id,
+    is_collection_url,
+    expand_collection,
+    run_extraction,
+    run_batch,
+    iter_batch_jsonl,
+    write_chunks,
+    export_bytes,
+    read_bytes,
+    EXPORT_DIR,
+    EXPORT_FORMATS,
+    get_transcript_cache,
+    get_corpus_index,
+    summarize_text_free,
+    translate_text_detailed,
+    translate_segments,
+    trace_request,
+    stage,
+    get_metrics,
+    get_job_queue,
+    run_in_process,
+    JOB_PRIORITY_HIGH,
+    JOB_ACTIVE_STATES,
+    format_timestamp,
+    parse_time_to_seconds,
+)
 
-# دالة تلخيص النص (مجانية)
-def summarize_text_free(text, num_sentences=5):
-    """تلخيص النص باستخدام خوارزمية بسيطة ومجانية"""
-    try:
-        # تقسيم النص إلى جمل
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        if len(sentences) <= num_sentences:
-            return text
-        
-        # حساب تكرار الكلمات
-        words = re.findall(r'\b\w+\b', text.lower())
-        word_freq = Counter(words)
-        
-        # استبعاد الكلمات الشائعة
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'}
-        
-        # حساب نقاط الجمل
-        sentence_scores = {}
-        for sentence in sentences:
-            words_in_sentence = re.findall(r'\b\w+\b', sentence.lower())
-            score = sum(word_freq[word] for word in words_in_sentence if word not in stop_words)
-            sentence_scores[sentence] = score
-        
-        # اختيار أفضل الجمل
-        top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
-        
-        # ترتيب الجمل حسب ظهورها في النص الأصلي
-        summary_sentences = []
-        for sentence in sentences:
-            if any(sentence == top_sent[0] for top_sent in top_sentences):
-                summary_sentences.append(sentence)
-        
-        return '. '.join(summary_sentences[:num_sentences]) + '.'
-        
-    except Exception as e:
-        return text[:500] + "..."  # تلخيص بسيط
+# أسماء اللغات المعروضة في الواجهة ورموزها
+LANGUAGE_NAMES = {
+    'العربية': 'ar',
+    'الإنجليزية': 'en',
+    'الفرنسية': 'fr',
+    'الألمانية': 'de',
+    'الإسبانية': 'es',
+    'الإيطالية': 'it',
+    'البرتغالية': 'pt',
+    'الروسية': 'ru',
+    'اليابانية': 'ja',
+    'الصينية': 'zh'
+}
+
+# عدد الطلبات المحفوظة في الجلسة للوحة التشخيص، والمعروض منها
+DIAGNOSTICS_MAX_TRACES = 20
+DIAGNOSTICS_VISIBLE_TRACES = 5
 
-# دالة تحليل النص
-def analyze_text(text):
-    """تحليل شامل للنص"""
+# دالة حفظ مراحل طلب في الجلسة
+def remember_trace(trace):
+    traces = st.session_state.setdefault('traces', [])
+    traces.append(trace)
+    del traces[:-DIAGNOSTICS_MAX_TRACES]
+
+# دالة تتبع طلب من الواجهة وحفظه في الجلسة
+@contextmanager
+def traced(name, **attrs):
+    """trace_request مع حفظ النتيجة للوحة التشخيص حتى عند الخطأ"""
+    trace = None
     try:
-        # إحصائيات أساسية
-        words = re.findall(r'\b\w+\b', text)
-        sentences = re.split(r'[.!?]+', text)
-        paragraphs = text.split('\n\n')
-        
-        # تحليل الكلمات
-        word_freq = Counter(word.lower() for word in words if len(word) > 3)
-        top_words = word_freq.most_common(10)
-        
-        # تقدير وقت القراءة (200 كلمة في الدقيقة)
-        reading_time = len(words) / 200
-        
-        # تحليل طول الجمل
-        sentence_lengths = [len(s.split()) for s in sentences if s.strip()]
-        avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths) if sentence_lengths else 0
-        
-        return {
-            'total_words': len(words),
-            'total_sentences': len([s for s in sentences if s.strip()]),
-            'total_paragraphs': len([p for p in paragraphs if p.strip()]),
-            'reading_time_minutes': round(reading_time, 1),
-            'avg_sentence_length': round(avg_sentence_length, 1),
-            'top_words': top_words,
-            'unique_words': len(set(word.lower() for word in words))
-        }
-    except:
+        with trace_request(name, **attrs) as trace:
+            yield trace
+    finally:
+        if trace is not None:
+            remember_trace(trace.to_dict())
+
+# دالة لوحة التشخيص في الشريط الجانبي
+def render_diagnostics():
+    """مراحل آخر طلبات الجلسة، ونسب p50/p95 لكل مرحلة عبر كل الجلسات، وتصدير المقاييس بصيغة Prometheus"""
+    with st.sidebar.expander("🩺 التشخيص"):
+        st.markdown("**آخر الطلبات:**")
+        for trace in reversed(st.session_state.get('traces', [])[-DIAGNOSTICS_VISIBLE_TRACES:]):
+            st.caption(f"{trace['name']} · {trace['status']} · {trace['seconds'] * 1000:.0f} ms")
+            if trace['spans']:
+                st.dataframe([
+                    {
+                        'المرحلة': span['stage'] + (f" ⊂ {span['parent']}" if span.get('parent') else ''),
+                        'ms': round(span['seconds'] * 1000, 1),
+                        'بايت': span.get('bytes'),
+                        'مقاطع': span.get('segments'),
+                        'ذروة KiB': round(span['peak_bytes'] / 1024) if span.get('peak_bytes') is not None else None,
+                        'خطأ': span.get('error')
+                    }
+                    for span in trace['spans']
+                ], width="stretch", hide_index=True)
+        
+        metrics = get_metrics()
+        snapshot = metrics.snapshot()
+        st.markdown("**كل الجلسات (ms):**")
+        st.dataframe([
+            {'المرحلة': name, 'العدد': entry['count'],
+             'p50': round(entry['p50'] * 1000, 1), 'p95': round(entry['p95'] * 1000, 1)}
+            for kind in ('request', 'stage')
+            for name, entry in snapshot[kind].items()
+        ], width="stretch", hide_index=True)
+        
+        jobs = get_job_queue().stats()
+        if jobs:
+            st.caption("🧵 المهام الخلفية: " + " | ".join(f"{status}: {count}" for status, count in jobs.items()))
+        
+        st.download_button("📈 مقاييس Prometheus", data=metrics.prometheus_text,
+                           file_name="transcript_metrics.prom", mime="text/plain")
+
+# فترة استطلاع حالة المهام الخلفية (بالثواني)
+JOB_POLL_SECONDS = 0.5
+
+# دالة جدولة مهمة خلفية وربطها بالجلسة
+def start_job(state_key, kind, fn, *args, **kwargs):
+    """المهمة تعمل في طابور النواة، والجلسة تحفظ معرفها فقط فلا تضيع بإعادة التشغيل"""
+    st.session_state[state_key] = get_job_queue().submit(kind, fn, *args, **kwargs)
+
+# جزء يُعاد تشغيله وحده لعرض تقدم مهمة حتى انتهائها
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job_id, label):
+    job = get_job_queue().get(job_id)
+    if job is None or job['status'] not in JOB_ACTIVE_STATES:
+        # انتهت المهمة: إعادة تشغيل الصفحة كاملة لعرض النتيجة
+        st.rerun()
+    
+    if job['status'] == 'queued':
+        st.info(f"⏳ {label} في الطابور (الموقع {job['position']})")
+        if st.button("✖️ إلغاء", key=f"cancel_{job_id}"):
+            get_job_queue().cancel(job_id)
+            st.rerun()
+    else:
+        st.info(f"⚙️ {label}... ({time.time() - job['started']:.0f} ث)")
+    
+    for kind, message in job['messages']:
+        getattr(st, kind)(message)
+    if 'status' in job['partial']:
+        st.caption(job['partial']['status'])
+    if 'preview' in job['partial']:
+        st.text_area("معاينة أثناء التحميل:", value=job['partial']['preview'], height=200)
+    if 'progress' in job['partial']:
+        progress = job['partial']['progress']
+        st.progress(progress['done'] / max(1, progress['total']), text=f"{progress['done']} / {progress['total']}")
+        if progress.get('rows'):
+            st.dataframe(progress['rows'], width="stretch")
+
+# دالة متابعة مهمة الجلسة
+def poll_job(state_key, label):
+    """لقطة المهمة مرة واحدة عند انتهائها؛ None أثناء عملها (مع عرض تقدمها) أو عند عدم وجودها"""
+    job_id = st.session_state.get(state_key)
+    if not job_id:
         return None
+    
+    job = get_job_queue().get(job_id)
+    if job is not None and job['status'] in JOB_ACTIVE_STATES:
+        job_progress(job_id, label)
+        return None
+    
+    # النتيجة صارت في الجلسة، فتُحذف المهمة من الطابور المشترك
+    st.session_state.pop(state_key)
+    get_job_queue().forget(job_id)
+    if job is None:
+        st.warning(f"⚠️ انتهت صلاحية المهمة: {label}")
+    elif job['status'] == 'error':
+        st.error(f"❌ {label}: {job['error']}")
+    elif job['status'] == 'cancelled':
+        st.info(f"✖️ أُلغيت المهمة: {label}")
+    if job and job['trace']:
+        remember_trace(job['trace'])
+    return job if job and job['status'] == 'done' else None
 
-# دالة البحث في النص
-def search_in_text(text, query, transcript_data=None):
-    """البحث في النص مع إظهار المقاطع"""
-    try:
-        if not query.strip():
-            return []
-        
-        results = []
-        query_lower = query.lower()
-        
-        if transcript_data:
-            # البحث في المقاطع مع الأوقات
-            for segment in transcript_data:
-                text_segment = segment['text'].lower()
-                if query_lower in text_segment:
-                    start_time = segment['start']
-                    start_min = int(start_time // 60)
-                    start_sec = int(start_time % 60)
-                    time_str = f"{start_min:02d}:{start_sec:02d}"
-                    
-                    # تمييز النص المطلوب
-                    highlighted_text = segment['text']
-                    for word in query.split():
-                        highlighted_text = re.sub(
-                            f'({re.escape(word)})', 
-                            r'**\1**', 
-                            highlighted_text, 
-                            flags=re.IGNORECASE
-                        )
-                    
-                    results.append({
-                        'time': time_str,
-                        'text': highlighted_text,
-                        'timestamp': start_time
-                    })
-        else:
-            # البحث في النص العادي
-            sentences = re.split(r'[.!?]+', text)
-            for sentence in sentences:
-                if query_lower in sentence.lower():
-                    highlighted_text = sentence
-                    for word in query.split():
-                        highlighted_text = re.sub(
-                            f'({re.escape(word)})', 
-                            r'**\1**', 
-                            highlighted_text, 
-                            flags=re.IGNORECASE
-                        )
-                    results.append({
-                        'time': 'غير محدد',
-                        'text': highlighted_text,
-                        'timestamp': 0
-                    })
-        
-        return results[:20]  # أول 20 نتيجة
-    except:
-        return []
-
-# دالة تصدير متقدم
-def create_advanced_export(transcript_data, full_text, video_info, analysis, language):
-    """إنشاء تصدير متقدم بتنسيق جميل"""
+# عدد مقاطع صفحة العارض، وأقصى عدد مقاطع يُرسل للمتصفح في إعادة تشغيل واحدة
+VIEWER_PAGE_SEGMENTS = 100
+VIEWER_MAX_SEGMENTS = 500
+
+# دالة تحديد نافذة العارض (تُستدعى من أزرار العارض ونتائج البحث قبل إعادة التشغيل)
+def set_viewer_window(start, size=VIEWER_PAGE_SEGMENTS):
+    st.session_state.viewer_start = max(0, start)
+    st.session_state.viewer_size = min(size, VIEWER_MAX_SEGMENTS)
+
+# دالة الانتقال إلى وقت محدد في العارض
+def jump_viewer_to_time(transcript_data):
+    value = st.session_state.get('viewer_jump', '').strip()
+    if value:
+        set_viewer_window(transcript_data.index_at(parse_time_to_seconds(value)))
+
+# دالة الانتقال من نتيجة بحث إلى موضعها في العارض
+def jump_viewer_to_match(segment):
+    set_viewer_window(segment)
+    st.toast("📝 افتح تبويب النص لعرض هذا الموضع")
+
+# دالة عارض النص المقسم إلى صفحات
+def render_transcript_viewer(transcript_data):
+    """عرض نافذة من المقاطع فقط بدلاً من النص كاملاً، فحجم ما يُرسل للمتصفح محدود مهما طال الفيديو"""
+    total = len(transcript_data)
+    start = min(st.session_state.get('viewer_start', 0), max(0, total - 1))
+    size = st.session_state.get('viewer_size', VIEWER_PAGE_SEGMENTS)
+    window = transcript_data[start:start + size]
     
-    try:
-        export_content = f"""# تقرير تفصيلي - YouTube Transcript Pro
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.text_input("⏩ انتقل إلى الوقت (MM:SS أو HH:MM:SS):", key="viewer_jump",
+                      on_change=jump_viewer_to_time, args=(transcript_data,))
+    with col2:
+        show_times = st.toggle("⏰ الطوابع الزمنية", value=True, key="viewer_times")
+    
+    if not window:
+        return
+    
+    last_time = format_timestamp(window.start_at(len(window) - 1))
+    st.caption(f"المقاطع {start + 1}–{start + len(window)} من {total} "
+               f"({format_timestamp(window.start_at(0))} – {last_time})")
+    st.text_area("النص:", value=window.timed_text() if show_times else window.full_text, height=500,
+                 label_visibility="collapsed")
+    
+    # التحميل الإضافي يوسع النافذة حتى الحد الأقصى ثم يزيحها للأمام
+    grown = size + VIEWER_PAGE_SEGMENTS
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.button("⬅️ السابق", disabled=start == 0, width="stretch",
+                  on_click=set_viewer_window, args=(start - VIEWER_PAGE_SEGMENTS,))
+    with col2:
+        st.button("⬇️ تحميل المزيد", disabled=start + size >= total, width="stretch",
+                  on_click=set_viewer_window, args=(start + max(0, grown - VIEWER_MAX_SEGMENTS), grown))
+    with col3:
+        st.button("التالي ➡️", disabled=start + size >= total, width="stretch",
+                  on_click=set_viewer_window, args=(start + size,))
 
-## معلومات الفيديو
-- **العنوان:** {video_info.get('title', 'غير متوفر') if video_info else 'غير متوفر'}
-- **القناة:** {video_info.get('uploader', 'غير متوفر') if video_info else 'غير متوفر'}
-- **المدة:** {video_info.get('duration', 0) // 60 if video_info and video_info.get('duration') else 0} دقيقة
-- **المشاهدات:** {video_info.get('view_count', 0):,} مشاهدة
-- **اللغة:** {language}
-- **تاريخ الاستخراج:** {time.strftime('%Y-%m-%d %H:%M:%S')}
+# عدد أحرف صفحة النص المترجم المعروضة (النص كاملاً متاح من زر التحميل فقط)
+TEXT_PAGE_CHARS = 10000
 
-## إحصائيات النص
-"""
-        
-        if analysis:
-            export_content += f"""
-- **إجمالي الكلمات:** {analysis['total_words']:,}
-- **إجمالي الجمل:** {analysis['total_sentences']:,}
-- **الكلمات الفريدة:** {analysis['unique_words']:,}
-- **وقت القراءة المقدر:** {analysis['reading_time_minutes']} دقيقة
-- **متوسط طول الجملة:** {analysis['avg_sentence_length']} كلمة
+# دالة تقسيم نص طويل إلى صفحات
+def text_page_bounds(text, size=TEXT_PAGE_CHARS):
+    """حدود الصفحات (بداية، نهاية)، تُقطع عند مسافة حتى لا تنقسم كلمة بين صفحتين"""
+    bounds = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            space = text.rfind(' ', start + size // 2, end)
+            if space != -1:
+                end = space + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
 
-### أهم الكلمات المتكررة:
-"""
-            for word, count in analysis['top_words'][:10]:
-                export_content += f"- {word}: {count} مرة\n"
-        
-        export_content += f"""
+# دالة عرض نص طويل صفحةً صفحة
+def render_text_pages(label, text, key):
+    """صفحة واحدة فقط تُرسل للمتصفح في كل إعادة تشغيل مهما طال النص"""
+    bounds = text_page_bounds(text) or [(0, 0)]
+    page = 1
+    if len(bounds) > 1:
+        page = st.number_input(f"الصفحة (من {len(bounds)}):", min_value=1, max_value=len(bounds), key=key)
+    start, end = bounds[page - 1]
+    st.text_area(label, value=text[start:end], height=400)
 
-## النص الكامل
-{full_text}
+# دالة اختيار لغات النص المفضلة
+def preferred_languages_input(key):
+    """قائمة رموز اللغات المفضلة بترتيب اختيارها (فارغة = اللغة الأصلية للفيديو أولاً)"""
+    names = st.multiselect("🗣️ لغات النص المفضلة (بالترتيب):", list(LANGUAGE_NAMES), key=key,
+                           help="بدون اختيار: النص اليدوي بلغة الفيديو الأصلية أولاً")
+    return tuple(LANGUAGE_NAMES[name] for name in names)
 
-## النص مع الطوابع الزمنية
-"""
-        
-        for segment in transcript_data:
-            start_time = segment['start']
-            start_min = int(start_time // 60)
-            start_sec = int(start_time % 60)
-            time_str = f"{start_min:02d}:{start_sec:02d}"
-            export_content += f"[{time_str}] {segment['text']}\n\n"
-        
-        export_content += f"""
----
-تم إنشاؤه بواسطة YouTube Transcript Pro
-تطبيق مجاني 100% لاستخراج وتحليل نصوص اليوتيوب
-"""
-        
-        return export_content
-        
-    except Exception as e:
-        return f"خطأ في إنشاء التقرير: {str(e)}"
+# دالة زر تحميل يُنشئ الملف عند الضغط فقط
+def export_download_button(label, transcript_data, fmt, meta, file_name):
+    """زر تحميل بصيغة من EXPORT_FORMATS؛ الملف يُكتب بالتدفق عند أول ضغطة ويُحفظ لكل فيديو"""
+    mime, _ = EXPORT_FORMATS[fmt]
+    st.download_button(
+        label=label,
+        data=partial(export_bytes, transcript_data, fmt, meta),
+        file_name=file_name,
+        mime=mime
+    )
 
-# دالة استخراج النصوص باستخدام yt-dlp
-def get_transcript_with_ytdlp(youtube_url):
-    """استخراج النصوص باستخدام yt-dlp"""
+# دالة مهمة الدفعة (تعمل في طابور المهام، دون أي استدعاء لـ Streamlit)
+def batch_job(collection_url, max_videos, workers, preferred_langs, on_progress):
+    """توسيع الرابط واستخراج كل فيديوهاته ثم كتابة JSONL؛ جدول الحالة يُرسل بعد كل فيديو كرسالة 'progress'"""
+    on_progress('status', "🔍 جلب قائمة الفيديوهات...")
+    title, videos = expand_collection(collection_url, max_videos)
+    on_progress('clear', '')
+    if not videos:
+        return None
     
-    try:
-        st.info("🔍 استخراج النصوص باستخدام yt-dlp...")
-        
-        ydl_opts = {
-    'writesubtitles': True,
-    'writeautomaticsub': True,
-    'skip_download': True,
-    'subtitleslangs': ['ar', 'en', 'es', 'fr', 'de', 'it', 'pt', 'ru'],
-    'quiet': True,
-    'extract_flat': False,
-    'no_warnings': False,
-    'ignoreerrors': False,
-    'geo_bypass': True,
-    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-}
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # استخراج معلومات الفيديو والنصوص
-            info = ydl.extract_info(youtube_url, download=False)
-            
-            # فحص النصوص المتاحة
-            subtitles = info.get('subtitles', {})
-            automatic_captions = info.get('automatic_captions', {})
-            
-            st.info(f"📊 نصوص يدوية: {len(subtitles)} لغة")
-            st.info(f"📊 نصوص تلقائية: {len(automatic_captions)} لغة")
-            
-            # جرب النصوص اليدوية أولاً
-            if subtitles:
-                for lang, subtitle_list in subtitles.items():
-                    try:
-                        st.info(f"🔄 تجربة النص اليدوي: {lang}")
-                        
-                        # اختر أفضل تنسيق متاح
-                        for subtitle in subtitle_list:
-                            if subtitle.get('ext') in ['vtt', 'srt', 'ttml']:
-                                subtitle_url = subtitle.get('url')
-                                if subtitle_url:
-                                    st.success(f"✅ وجدت نص يدوي باللغة: {lang}")
-                                    return download_and_parse_subtitle(subtitle_url, lang, 'يدوي')
-                    except Exception as e:
-                        st.warning(f"فشل في استخراج النص اليدوي {lang}: {str(e)}")
-                        continue
-            
-            # إذا لم توجد نصوص يدوية، جرب التلقائية
-            if automatic_captions:
-                for lang, caption_list in automatic_captions.items():
-                    try:
-                        st.info(f"🔄 تجربة النص التلقائي: {lang}")
-                        
-                        # اختر أفضل تنسيق متاح
-                        for caption in caption_list:
-                            if caption.get('ext') in ['vtt', 'srt', 'ttml']:
-                                caption_url = caption.get('url')
-                                if caption_url:
-                                    st.success(f"✅ وجدت نص تلقائي باللغة: {lang}")
-                                    return download_and_parse_subtitle(caption_url, lang, 'تلقائي')
-                    except Exception as e:
-                        st.warning(f"فشل في استخراج النص التلقائي {lang}: {str(e)}")
-                        continue
-            
-            st.error("❌ لم يتم العثور على أي نصوص")
-            return None, None
-            
-    except Exception as e:
-        st.error(f"❌ خطأ في yt-dlp: {str(e)}")
-        return None, None
+    on_progress('info', f"📋 {title}: {len(videos)} فيديو")
+    rows = [{'الفيديو': video['title'], 'الحالة': '⏳', 'المقاطع': 0, 'الزمن (ث)': None} for video in videos]
+    done = 0
+    
+    def on_video(index, record):
+        nonlocal done
+        done += 1
+        if record['status'] == 'ok':
+            rows[index].update({'الفيديو': record['title'], 'الحالة': '⚡' if record['cached'] else '✅',
+                                'المقاطع': len(record['transcript_data'])})
+        else:
+            rows[index]['الحالة'] = f"❌ {record['error'][:80]}"
+        rows[index]['الزمن (ث)'] = record['seconds']
+        # نسخة من الجدول لأن الجلسة تقرؤه من خيط آخر
+        on_progress('progress', {'done': done, 'total': len(videos), 'rows': [dict(row) for row in rows]})
+    
+    on_progress('progress', {'done': 0, 'total': len(videos), 'rows': [dict(row) for row in rows]})
+    started = time.time()
+    records = run_batch(videos, workers, on_video, preferred_langs)
+    
+    # كتابة الدفعة إلى القرص بالتدفق بدلاً من بنائها نصاً واحداً في الذاكرة
+    export_path = os.path.join(EXPORT_DIR, f"batch_{int(started)}.jsonl")
+    write_chunks(iter_batch_jsonl(records), export_path)
+    
+    return {
+        'path': export_path,
+        'title': title,
+        'records': records,
+        'rows': rows,
+        'seconds': round(time.time() - started, 1)
+    }
 
-# دالة تحميل وتحليل ملف النص
-def download_and_parse_subtitle(subtitle_url, language, type_desc):
-    """تحميل وتحليل ملف النص"""
+# دالة واجهة المعالجة الدفعية
+def render_batch_mode():
+    """واجهة استخراج نصوص قائمة تشغيل أو قناة كاملة مع تقدم لكل فيديو وتصدير JSONL مجمع"""
+    collection_url = st.text_input("🔗 رابط قائمة التشغيل أو القناة:",
+                                   placeholder="https://www.youtube.com/playlist?list=...")
     
-    try:
-        st.info(f"📥 تحميل ملف النص ({type_desc})...")
-        
-        # تحميل ملف النص
-        response = requests.get(subtitle_url)
-        response.raise_for_status()
+    col1, col2 = st.columns(2)
+    with col1:
+        max_videos = st.number_input("الحد الأقصى للفيديوهات:", min_value=1, max_value=BATCH_MAX_VIDEOS, value=50)
+    with col2:
+        workers = st.slider("عدد العمليات المتوازية:", 1, 16, BATCH_MAX_WORKERS)
+    preferred_langs = preferred_languages_input("batch_preferred_langs")
+    
+    if st.button("🚀 استخراج الدفعة", type="primary"):
+        if not is_collection_url(collection_url):
+            st.error("❌ رابط غير صحيح. ضع رابط قائمة تشغيل أو قناة")
+            return
+        
+        st.session_state.pop('batch_result', None)
+        # الدفعة مهمة خلفية: التفاعل مع الصفحة أثناءها لا يلغيها
+        start_job('batch_job', 'batch', batch_job, collection_url, int(max_videos), workers, preferred_langs,
+                  progress=True)
+    
+    if 'batch_job' in st.session_state:
+        job = poll_job('batch_job', "جاري استخراج الدفعة")
+        if job:
+            for kind, message in job['messages']:
+                getattr(st, kind)(message)
+            if job['result']:
+                st.session_state.batch_result = job['result']
+            else:
+                st.warning("⚠️ لا توجد فيديوهات في هذا الرابط")
+    
+    if 'batch_result' in st.session_state:
+        batch = st.session_state.batch_result
+        records = batch['records']
+        succeeded = sum(1 for record in records if record['status'] == 'ok')
+        
+        st.success(f"🎉 تم استخراج {succeeded} من {len(records)} فيديو في {batch['seconds']} ثانية")
+        if succeeded < len(records):
+            st.warning(f"⚠️ فشل {len(records) - succeeded} فيديو")
+        st.dataframe(batch['rows'], width="stretch")
+        
+        st.download_button(
+            label="📦 تحميل الدفعة (JSONL)",
+            data=partial(read_bytes, batch['path']),
+            file_name="transcripts_batch.jsonl",
+            mime="application/jsonl"
+        )
+
+# دالة واجهة البحث في كل النصوص
+def render_corpus_mode():
+    """البحث في كل النصوص المستخرجة سابقاً مع روابط تفتح الفيديو عند لحظة ظهور العبارة"""
+    corpus = get_corpus_index()
+    corpus_stats = corpus.stats()
+    st.caption(f"📚 {corpus_stats['videos']:,} فيديو · {corpus_stats['segments']:,} مقطع مفهرس")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input("🔍 ابحث في كل النصوص:", key="corpus_query")
+    with col2:
+        uploader = st.selectbox("القناة:", ["الكل"] + corpus.uploaders(), key="corpus_uploader")
+    st.caption('💡 ضع العبارة بين علامتي تنصيص "..." للمطابقة الحرفية')
+    
+    if not query:
+        return
+    
+    page = st.session_state.get('corpus_page', 1) - 1
+    search = corpus.search(query, page, uploader=None if uploader == "الكل" else uploader)
+    
+    if not search['results']:
+        st.warning("لم يتم العثور على نتائج")
+        return
+    
+    st.success(f"✅ وجدت {search['total']:,} نتيجة ({search['seconds'] * 1000:.0f} ms)")
+    for hit in search['results']:
+        st.markdown(f"[⏰ {hit['time']}]({hit['url']}) **{hit['title']}** — {hit['text']}")
+    
+    if search['pages'] > 1:
+        st.session_state.corpus_page = search['page'] + 1
+        st.number_input(f"الصفحة (من {search['pages']}):", min_value=1,
+                        max_value=search['pages'], key="corpus_page")
+
+# دالة عرض النتيجة المحفوظة في الجلسة
+def render_results(result):
+    """عرض معلومات الفيديو والنص والأدوات من نتيجة محفوظة دون إعادة الاستخراج"""
+    
+    video_id = result['video_id']
+    video_info = result['video_info']
+    transcript_data = result['transcript_data']
+    language = result['language']
+    analysis = result['analysis']
+    
+    # عرض معلومات الفيديو
+    if video_info:
+        st.subheader("ℹ️ معلومات الفيديو:")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**العنوان:** {video_info['title']}")
+            st.write(f"**القناة:** {video_info['uploader']}")
+            
+        with col2:
+            duration_min = video_info['duration'] // 60 if video_info['duration'] else 0
+            st.write(f"**المدة:** {duration_min} دقيقة")
+            if video_info['view_count']:
+                st.write(f"**المشاهدات:** {video_info['view_count']:,}")
+    
+    st.success(f"🎉 تم استخراج النص بنجاح! (اللغة: {language})")
+    if result.get('asr'):
+        asr = result['asr']
+        st.caption(f"🎙️ تعرف صوتي ({asr['backend']} {asr['model'] or ''}): {asr['audio_seconds']} ث صوت "
+                   f"في {asr['seconds']} ث، {asr['chunks']} مقطع، عامل الزمن الحقيقي {asr['realtime_factor']}")
+    
+    # النص الكامل للترجمة والتلخيص (دون إرساله للمتصفح)
+    full_text = transcript_data.full_text
+    
+    # عرض الإحصائيات
+    if analysis:
+        st.subheader("📊 إحصائيات النص:")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("إجمالي الكلمات", f"{analysis['total_words']:,}")
+        with col2:
+            st.metric("إجمالي الجمل", f"{analysis['total_sentences']:,}")
+        with col3:
+            st.metric("وقت القراءة", f"{analysis['reading_time_minutes']} دقيقة")
+        with col4:
+            st.metric("الكلمات الفريدة", f"{analysis['unique_words']:,}")
+    
+    # أشرطة التبويب للمحتوى
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📝 النص", "🔍 البحث", "🌍 ترجمة", "📋 تلخيص", "📈 تحليل"])
+    
+    with tab1:
+        st.subheader("النص مع الطوابع الزمنية:")
+        render_transcript_viewer(transcript_data)
+    
+    with tab2:
+        st.subheader("🔍 البحث في النص:")
+        search_query = st.text_input("ابحث عن كلمة أو عبارة:")
         
-        subtitle_content = response.text
-        st.success(f"✅ تم تحميل الملف: {len(subtitle_content)} حرف")
+        st.caption('💡 ضع العبارة بين علامتي تنصيص "..." للمطابقة الحرفية')
         
-        # تحليل ملف VTT/SRT
-        transcript_data = parse_subtitle_content(subtitle_content)
+        if search_query:
+            page = st.session_state.get('search_page', 1) - 1
+            search = result['search_index'].search(search_query, page)
+            
+            if search['results']:
+                st.success(f"✅ وجدت {search['total']} نتيجة:")
+                
+                for match in search['results']:
+                    with st.expander(f"⏰ {match['time']} - {match['text'][:50]}..."):
+                        st.markdown(match['text'])
+                        st.button("📍 عرض في النص", key=f"jump_{match['segment']}",
+                                  on_click=jump_viewer_to_match, args=(match['segment'],))
+                
+                if search['pages'] > 1:
+                    st.session_state.search_page = search['page'] + 1
+                    st.number_input(f"الصفحة (من {search['pages']}):", min_value=1,
+                                    max_value=search['pages'], key="search_page")
+            else:
+                st.warning("لم يتم العثور على نتائج")
+    
+    with tab3:
+        st.subheader("🌍 ترجمة النص:")
         
-        if transcript_data:
-            st.success(f"✅ تم تحليل {len(transcript_data)} مقطع")
-            return transcript_data, f"{language} ({type_desc})"
-        else:
-            st.error("❌ فشل في تحليل محتوى النص")
-            return None, None
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            target_languages = LANGUAGE_NAMES
             
-    except Exception as e:
-        st.error(f"❌ خطأ في تحميل النص: {str(e)}")
-        return None, None
-
-# دالة تحليل محتوى النص
-def parse_subtitle_content(content):
-    """تحليل محتوى ملف النص VTT أو SRT"""
+            selected_lang = st.selectbox("اختر لغة الترجمة:", list(target_languages.keys()))
+            
+            if st.button("🔄 ترجم النص"):
+                start_job('translation_job', 'translation', translate_text_detailed,
+                          full_text, target_languages[selected_lang])
+            
+            job = poll_job('translation_job', "جاري الترجمة")
+            if job:
+                translation = job['result']
+                st.session_state.translated_text = translation['text']
+                st.session_state.pop('translated_page', None)
+                if translation['failed']:
+                    st.warning(f"⚠️ فشلت ترجمة {len(translation['failed'])} من {translation['chunks']} جزء، وبقي نصها الأصلي")
+        
+        with col2:
+            if 'translated_text' in st.session_state:
+                render_text_pages("النص المترجم:", st.session_state.translated_text, "translated_page")
+        
+        st.subheader("⏱️ ترجمة المقاطع مع الأوقات:")
+        segment_langs = st.multiselect("اختر لغة أو أكثر:", list(target_languages.keys()), key="segment_langs")
+        
+        if st.button("🔄 ترجم المقاطع", disabled=not segment_langs):
+            start_job('segments_job', 'segment_translation', translate_segments,
+                      transcript_data, [target_languages[name] for name in segment_langs])
+        
+        job = poll_job('segments_job', "جاري ترجمة المقاطع")
+        if job:
+            st.session_state.translated_segments = job['result']
+            for lang, translation in job['result'].items():
+                if translation['failed']:
+                    st.warning(f"⚠️ {lang}: فشلت {len(translation['failed'])} من {translation['batches']} دفعة، وبقي نصها الأصلي")
+        
+        if 'translated_segments' in st.session_state:
+            for lang, translation in st.session_state.translated_segments.items():
+                col1, col2 = st.columns(2)
+                with col1:
+                    export_download_button(f"📄 SRT ({lang})", translation['segments'], 'srt',
+                                           {'video_id': f"{video_id}.{lang}"}, f"transcript_{video_id}.{lang}.srt")
+                with col2:
+                    export_download_button(f"📄 VTT ({lang})", translation['segments'], 'vtt',
+                                           {'video_id': f"{video_id}.{lang}"}, f"transcript_{video_id}.{lang}.vtt")
     
-    try:
-        transcript_data = []
-        lines = content.split('\n')
+    with tab4:
+        st.subheader("📋 تلخيص النص:")
         
-        current_text = ""
-        current_start = 0
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            num_sentences = st.slider("عدد الجمل في التلخيص:", 3, 10, 5)
+            
+            if st.button("📝 لخص النص"):
+                # التلخيص حساب خالص: يعمل في عملية منفصلة دون حجز GIL عن الجلسات الأخرى
+                start_job('summary_job', 'summary', run_in_process, summarize_text_free, full_text, num_sentences)
+            
+            job = poll_job('summary_job', "جاري التلخيص")
+            if job:
+                st.session_state.summary = job['result']
         
-        for line in lines:
-            line = line.strip()
+        with col2:
+            if 'summary' in st.session_state:
+                st.text_area("التلخيص:", value=st.session_state.summary, height=300)
+    
+    with tab5:
+        if analysis:
+            st.subheader("📈 تحليل مفصل:")
             
-            # تخطي الأسطر الفارغة ورؤوس VTT
-            if not line or line.startswith('WEBVTT') or line.startswith('NOTE'):
-                continue
+            col1, col2 = st.columns(2)
             
-            # فحص إذا كان السطر يحتوي على توقيت
-            if '-->' in line:
-                # استخراج الوقت
-                time_parts = line.split('-->')
-                if len(time_parts) >= 2:
-                    start_time_str = time_parts[0].strip()
-                    
-                    # تحويل الوقت إلى ثواني
-                    start_seconds = parse_time_to_seconds(start_time_str)
-                    current_start = start_seconds
-                    
-            elif line and not line.isdigit():
-                # هذا نص
-                # تنظيف النص من علامات HTML
-                clean_text = clean_subtitle_text(line)
-                if clean_text:
-                    current_text = clean_text
-                    
-                    if current_text:
-                        transcript_data.append({
-                            'start': current_start,
-                            'text': current_text
-                        })
-                        current_text = ""
-        
-        return transcript_data
-        
-    except Exception as e:
-        st.error(f"خطأ في تحليل النص: {str(e)}")
-        return []
-
-# دالة تحويل الوقت إلى ثواني
-def parse_time_to_seconds(time_str):
-    """تحويل سلسلة الوقت إلى ثواني"""
+            with col1:
+                st.write("**الكلمات الأكثر تكراراً:**")
+                for word, count in analysis['top_words']:
+                    st.write(f"• {word}: {count} مرة")
+            
+            with col2:
+                st.write("**معلومات إضافية:**")
+                st.write(f"• متوسط طول الجملة: {analysis['avg_sentence_length']} كلمة")
+                st.write(f"• نسبة الكلمات الفريدة: {(analysis['unique_words']/analysis['total_words']*100):.1f}%")
+                
+                # تقييم مستوى صعوبة النص
+                if analysis['avg_sentence_length'] > 20:
+                    difficulty = "صعب"
+                elif analysis['avg_sentence_length'] > 15:
+                    difficulty = "متوسط"
+                else:
+                    difficulty = "سهل"
+                st.write(f"• مستوى الصعوبة: {difficulty}")
     
-    try:
-        # إزالة الميلي ثانية إذا وجدت
-        time_str = time_str.split('.')[0]
-        
-        # تقسيم الوقت
-        parts = time_str.split(':')
-        
-        if len(parts) == 3:
-            hours, minutes, seconds = parts
-            return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-        elif len(parts) == 2:
-            minutes, seconds = parts
-            return int(minutes) * 60 + int(seconds)
+    # أزرار التحميل المتقدمة
+    st.subheader("📥 تحميل متقدم:")
+    
+    # الملفات تُنشأ عند الضغط فقط وتُحفظ على القرص لكل فيديو
+    meta = {'video_id': video_id, 'video_info': video_info, 'analysis': analysis, 'language': language}
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        export_download_button("📄 نص فقط", transcript_data, 'txt', meta, f"transcript_{video_id}.txt")
+    
+    with col2:
+        export_download_button("⏰ مع الأوقات", transcript_data, 'timed.txt', meta, f"transcript_timed_{video_id}.txt")
+    
+    with col3:
+        if 'translated_text' in st.session_state:
+            st.download_button(
+                label="🌍 مترجم",
+                data=partial(str.encode, st.session_state.translated_text),
+                file_name=f"transcript_translated_{video_id}.txt",
+                mime="text/plain"
+            )
         else:
-            return 0
-            
-    except:
-        return 0
-
-# دالة تنظيف النص
-def clean_subtitle_text(text):
-    """تنظيف النص من علامات HTML والتنسيق"""
+            st.button("🌍 مترجم", disabled=True, help="قم بترجمة النص أولاً")
     
-    # إزالة علامات HTML
-    text = re.sub(r'<[^>]+>', '', text)
+    with col4:
+        # تقرير شامل
+        export_download_button("📊 تقرير شامل", transcript_data, 'md', meta, f"report_{video_id}.md")
     
-    # إزالة المسافات الزائدة
-    text = ' '.join(text.split())
+    col1, col2, col3 = st.columns(3)
     
-    return text.strip()
-
-# دالة تنسيق النصوص المستخرجة
-def format_transcript(transcript_list):
-    """تنسيق النصوص مع الطوابع الزمنية"""
-    full_text = ""
-    timed_text = ""
-    word_count = 0
+    with col1:
+        export_download_button("🎞️ SRT", transcript_data, 'srt', meta, f"transcript_{video_id}.srt")
     
-    for entry in transcript_list:
-        start_time = entry['start']
-        text = entry['text'].strip()
-        
-        if not text:
-            continue
-        
-        # تنسيق الوقت
-        start_min = int(start_time // 60)
-        start_sec = int(start_time % 60)
-        time_str = f"{start_min:02d}:{start_sec:02d}"
-        
-        # إضافة للنص الكامل
-        full_text += text + " "
-        word_count += len(text.split())
-        
-        # إضافة للنص مع الأوقات
-        timed_text += f"[{time_str}] {text}\n\n"
+    with col2:
+        export_download_button("🎞️ WebVTT", transcript_data, 'vtt', meta, f"transcript_{video_id}.vtt")
     
-    return full_text.strip(), timed_text, word_count
-
-# دالة الحصول على معلومات الفيديو
-def get_video_info(youtube_url):
-    try:
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(youtube_url, download=False)
-            return {
-                'title': info.get('title', 'غير متوفر'),
-                'duration': info.get('duration', 0),
-                'uploader': info.get('uploader', 'غير متوفر'),
-                'view_count': info.get('view_count', 0),
-                'upload_date': info.get('upload_date', 'غير متوفر'),
-                'description': info.get('description', 'غير متوفر')
-            }
-    except Exception as e:
-        return None
-
-# الواجهة الرئيسية
-def main():
-    # شريط جانبي للمميزات
-    st.sidebar.title("🛠️ أدوات متقدمة")
-    st.sidebar.markdown("**جميع الأدوات مجانية 100%**")
+    with col3:
+        export_download_button("🧾 JSONL", transcript_data, 'jsonl', meta, f"transcript_{video_id}.jsonl")
     
+
+# دالة واجهة استخراج فيديو واحد
+def render_single_mode():
+    """إدخال رابط فيديو واحد واستخراجه ثم عرض النتيجة المحفوظة في الجلسة"""
     # مربع إدخال رابط اليوتيوب
     youtube_url = st.text_input("🔗 ضع رابط فيديو اليوتيوب هنا:", 
                                placeholder="https://www.youtube.com/watch?v=...")
+    preferred_langs = preferred_languages_input("preferred_langs")
     
     # زر الاستخراج
     if st.button("🚀 استخراج النصوص", type="primary"):
@@ -500,193 +627,34 @@ def main():
                 st.error("❌ رابط غير صحيح. تأكد من رابط اليوتيوب")
                 return
             
-            # عرض معلومات الفيديو
-            video_info = get_video_info(youtube_url)
-            if video_info:
-                st.subheader("ℹ️ معلومات الفيديو:")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**العنوان:** {video_info['title']}")
-                    st.write(f"**القناة:** {video_info['uploader']}")
-                    
-                with col2:
-                    duration_min = video_info['duration'] // 60 if video_info['duration'] else 0
-                    st.write(f"**المدة:** {duration_min} دقيقة")
-                    if video_info['view_count']:
-                        st.write(f"**المشاهدات:** {video_info['view_count']:,}")
+            # مسح نتائج الفيديو السابق ومهامه من الجلسة
+            for key in ('result', 'translated_text', 'translated_page', 'translated_segments', 'summary', 'search_page',
+                        'translation_job', 'segments_job', 'summary_job', 'viewer_start', 'viewer_size', 'viewer_jump'):
+                st.session_state.pop(key, None)
             
-            # استخراج النصوص
-            transcript_data, language = get_transcript_with_ytdlp(youtube_url)
-                
-            if transcript_data:
-                st.success(f"🎉 تم استخراج النص بنجاح! (اللغة: {language})")
-                
-                # تنسيق النصوص
-                full_text, timed_text, word_count = format_transcript(transcript_data)
-                
-                # تحليل النص
-                with st.spinner("🔍 تحليل النص..."):
-                    analysis = analyze_text(full_text)
+            # الاستخراج مهمة خلفية بأولوية عالية: التفاعل مع الصفحة أثناءه لا يلغيه
+            start_job('extraction_job', 'extraction', run_extraction, youtube_url, video_id,
+                      preferred_langs=preferred_langs, priority=JOB_PRIORITY_HIGH, progress=True)
+        else:
+            st.warning("⚠️ يرجى إدخال رابط فيديو اليوتيوب")
+    
+    if 'extraction_job' in st.session_state:
+        job = poll_job('extraction_job', "جاري الاستخراج")
+        if job:
+            # رسائل المهمة تبقى ظاهرة بعد انتهائها
+            for kind, message in job['messages']:
+                getattr(st, kind)(message)
+            result = job['result']
+            
+            if result:
+                st.session_state.result = result
                 
                 # تحديث إحصائيات الاستخدام
                 if 'usage_stats' not in st.session_state:
                     st.session_state.usage_stats = {'videos_processed': 0, 'words_extracted': 0}
                 
                 st.session_state.usage_stats['videos_processed'] += 1
-                st.session_state.usage_stats['words_extracted'] += word_count
-                
-                # عرض الإحصائيات
-                if analysis:
-                    st.subheader("📊 إحصائيات النص:")
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric("إجمالي الكلمات", f"{analysis['total_words']:,}")
-                    with col2:
-                        st.metric("إجمالي الجمل", f"{analysis['total_sentences']:,}")
-                    with col3:
-                        st.metric("وقت القراءة", f"{analysis['reading_time_minutes']} دقيقة")
-                    with col4:
-                        st.metric("الكلمات الفريدة", f"{analysis['unique_words']:,}")
-                
-                # أشرطة التبويب للمحتوى
-                tab1, tab2, tab3, tab4, tab5 = st.tabs(["📝 النص", "🔍 البحث", "🌍 ترجمة", "📋 تلخيص", "📈 تحليل"])
-                
-                with tab1:
-                    st.subheader("النص الكامل:")
-                    st.text_area("", value=full_text, height=300, key="full_text")
-                    
-                    st.subheader("النص مع الطوابع الزمنية:")
-                    st.text_area("", value=timed_text, height=400, key="timed_text")
-                
-                with tab2:
-                    st.subheader("🔍 البحث في النص:")
-                    search_query = st.text_input("ابحث عن كلمة أو عبارة:")
-                    
-                    if search_query:
-                        search_results = search_in_text(full_text, search_query, transcript_data)
-                        
-                        if search_results:
-                            st.success(f"✅ وجدت {len(search_results)} نتيجة:")
-                            
-                            for result in search_results:
-                                with st.expander(f"⏰ {result['time']} - {result['text'][:50]}..."):
-                                    st.markdown(result['text'])
-                        else:
-                            st.warning("لم يتم العثور على نتائج")
-                
-                with tab3:
-                    st.subheader("🌍 ترجمة النص:")
-                    
-                    col1, col2 = st.columns([1, 3])
-                    with col1:
-                        target_languages = {
-                            'العربية': 'ar',
-                            'الإنجليزية': 'en', 
-                            'الفرنسية': 'fr',
-                            'الألمانية': 'de',
-                            'الإسبانية': 'es',
-                            'الإيطالية': 'it',
-                            'البرتغالية': 'pt',
-                            'الروسية': 'ru',
-                            'اليابانية': 'ja',
-                            'الصينية': 'zh'
-                        }
-                        
-                        selected_lang = st.selectbox("اختر لغة الترجمة:", list(target_languages.keys()))
-                        
-                        if st.button("🔄 ترجم النص"):
-                            with st.spinner("جاري الترجمة..."):
-                                translated_text = translate_text_free(full_text, target_languages[selected_lang])
-                                st.session_state.translated_text = translated_text
-                    
-                    with col2:
-                        if 'translated_text' in st.session_state:
-                            st.text_area("النص المترجم:", value=st.session_state.translated_text, height=400)
-                
-                with tab4:
-                    st.subheader("📋 تلخيص النص:")
-                    
-                    col1, col2 = st.columns([1, 3])
-                    with col1:
-                        num_sentences = st.slider("عدد الجمل في التلخيص:", 3, 10, 5)
-                        
-                        if st.button("📝 لخص النص"):
-                            with st.spinner("جاري التلخيص..."):
-                                summary = summarize_text_free(full_text, num_sentences)
-                                st.session_state.summary = summary
-                    
-                    with col2:
-                        if 'summary' in st.session_state:
-                            st.text_area("التلخيص:", value=st.session_state.summary, height=300)
-                
-                with tab5:
-                    if analysis:
-                        st.subheader("📈 تحليل مفصل:")
-                        
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.write("**الكلمات الأكثر تكراراً:**")
-                            for word, count in analysis['top_words']:
-                                st.write(f"• {word}: {count} مرة")
-                        
-                        with col2:
-                            st.write("**معلومات إضافية:**")
-                            st.write(f"• متوسط طول الجملة: {analysis['avg_sentence_length']} كلمة")
-                            st.write(f"• نسبة الكلمات الفريدة: {(analysis['unique_words']/analysis['total_words']*100):.1f}%")
-                            
-                            # تقييم مستوى صعوبة النص
-                            if analysis['avg_sentence_length'] > 20:
-                                difficulty = "صعب"
-                            elif analysis['avg_sentence_length'] > 15:
-                                difficulty = "متوسط"
-                            else:
-                                difficulty = "سهل"
-                            st.write(f"• مستوى الصعوبة: {difficulty}")
-                
-                # أزرار التحميل المتقدمة
-                st.subheader("📥 تحميل متقدم:")
-                
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.download_button(
-                        label="📄 نص فقط",
-                        data=full_text,
-                        file_name=f"transcript_{video_id}.txt",
-                        mime="text/plain"
-                    )
-                
-                with col2:
-                    st.download_button(
-                        label="⏰ مع الأوقات",
-                        data=timed_text,
-                        file_name=f"transcript_timed_{video_id}.txt",
-                        mime="text/plain"
-                    )
-                
-                with col3:
-                    if 'translated_text' in st.session_state:
-                        st.download_button(
-                            label="🌍 مترجم",
-                            data=st.session_state.translated_text,
-                            file_name=f"transcript_translated_{video_id}.txt",
-                            mime="text/plain"
-                        )
-                    else:
-                        st.button("🌍 مترجم", disabled=True, help="قم بترجمة النص أولاً")
-                
-                with col4:
-                    # تقرير شامل
-                    advanced_report = create_advanced_export(transcript_data, full_text, video_info, analysis, language)
-                    st.download_button(
-                        label="📊 تقرير شامل",
-                        data=advanced_report,
-                        file_name=f"report_{video_id}.md",
-                        mime="text/markdown"
-                    )
+                st.session_state.usage_stats['words_extracted'] += result['transcript_data'].word_count()
                 
                 st.balloons()
                 
@@ -701,8 +669,40 @@ def main():
                 - المحاضرات والمقابلات غالباً محفورة
                 - الأخبار والبرامج الوثائقية عادة لها نصوص
                 """)
-        else:
-            st.warning("⚠️ يرجى إدخال رابط فيديو اليوتيوب")
+    
+    # عرض النتيجة المحفوظة في كل إعادة تشغيل (البحث، الترجمة، التلخيص...)
+    if 'result' in st.session_state:
+        with stage('render'):
+            render_results(st.session_state.result)
+
+# الواجهة الرئيسية
+def main():
+    # تحديد عنوان الصفحة
+    st.set_page_config(page_title="YouTube Transcript Pro", page_icon="🎬", layout="wide")
+    
+    # العنوان الرئيسي
+    st.title("🎬 YouTube Transcript Pro")
+    st.markdown("**منصة شاملة لاستخراج وتحليل نصوص اليوتيوب - مجاني 100%**")
+    
+    # شرح التطبيق
+    st.info("🚀 **مميزات جديدة:** استخراج + ترجمة + تلخيص + تحليل + بحث - كل شيء مجاني!")
+    
+    # شريط جانبي للمميزات
+    st.sidebar.title("🛠️ أدوات متقدمة")
+    st.sidebar.markdown("**جميع الأدوات مجانية 100%**")
+    
+    # اختيار وضع التشغيل: فيديو واحد أو دفعة كاملة
+    modes = {
+        "🎬 فيديو واحد": ('single', render_single_mode),
+        "📚 قائمة تشغيل / قناة": ('batch', render_batch_mode),
+        "🗂️ البحث في كل النصوص": ('corpus', render_corpus_mode)
+    }
+    mode = st.sidebar.radio("وضع الاستخراج:", list(modes))
+    
+    # كل إعادة تشغيل طلب متتبع: العرض والترجمة والتلخيص تظهر كمراحل فيه
+    mode_name, render_mode = modes[mode]
+    with traced('rerun', mode=mode_name):
+        render_mode()
 
     # الشريط الجانبي - معلومات المميزات
     with st.sidebar:
@@ -723,10 +723,16 @@ def main():
         st.metric("فيديوهات معالجة", st.session_state.usage_stats['videos_processed'])
         st.metric("كلمات مستخرجة", f"{st.session_state.usage_stats['words_extracted']:,}")
         
+        cache_stats = get_transcript_cache().stats()
+        st.metric("نسبة الإصابة في الذاكرة المؤقتة", f"{cache_stats['hit_rate'] * 100:.0f}%",
+                  help=f"إصابة: {cache_stats['hits']} | إخفاق: {cache_stats['misses']} | مدخلات: {cache_stats['entries']}")
+        
         # إضافة زر إعادة تعيين الإحصائيات
         if st.button("🔄 إعادة تعيين الإحصائيات"):
             st.session_state.usage_stats = {'videos_processed': 0, 'words_extracted': 0}
             st.success("تم إعادة تعيين الإحصائيات!")
+    
+    render_diagnostics()
 
     # أمثلة ناجحة للاختبار
     with st.expander("🧪 فيديوهات للاختبار"):
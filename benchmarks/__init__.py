@@ -0,0 +1 @@
+"""قياسات أداء المسارات الساخنة (python -m benchmarks.bench_pipeline)"""
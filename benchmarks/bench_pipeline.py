@@ -0,0 +1,223 @@
+"""قياس زمن وذاكرة المسارات الساخنة: التحليل والتنسيق والتحليل الإحصائي والتلخيص والبحث والتصدير والترجمة
+
+يعمل دون إنترنت: نقاط googlevideo وtranslate تُستبدل بخادم HTTP محلي.
+
+الاستخدام:
+    python -m benchmarks.bench_pipeline                      # 10 دقائق وساعة و10 ساعات
+    python -m benchmarks.bench_pipeline --sizes 10,60 --repeat 5
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# ذاكرة مؤقتة معزولة حتى لا تؤثر نتائج سابقة على القياس (قبل استيراد النواة)
+os.environ['TRANSCRIPT_CACHE_PATH'] = ':memory:'
+os.environ.setdefault('TRANSCRIPT_EXPORT_DIR', tempfile.mkdtemp(prefix='transcript-bench-'))
+
+import transcript_core as core
+from benchmarks.fixtures import synthetic_fixtures, recorded_fixtures
+
+# مجلد حفظ النتائج
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# الأطوال الافتراضية بالدقائق: 10 دقائق، ساعة، 10 ساعات
+DEFAULT_SIZES = (10, 60, 600)
+
+# استعلامات البحث: كلمة شائعة، كلمة نادرة، عبارة، بادئة
+SEARCH_QUERIES = ('data', 'term42', '"the model"', 'pyth')
+
+# نسبة التباطؤ التي تُعتبر تراجعاً عند المقارنة
+DEFAULT_THRESHOLD = 0.2
+
+# خادم HTTP محلي بديل لـ googlevideo وtranslate.googleapis
+class StandInHandler(BaseHTTPRequestHandler):
+    """/sub/<name> يعيد ملف النص المسجل، و/translate يعيد النص نفسه بصيغة استجابة الترجمة"""
+
+    protocol_version = 'HTTP/1.1'
+    fixtures = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.startswith('/sub/'):
+            body = self.fixtures.get(url.path[5:], b'')
+            content_type = 'text/vtt; charset=utf-8'
+        elif url.path == '/translate':
+            text = parse_qs(url.query).get('q', [''])[0]
+            body = json.dumps([[[text, text, None, None]]], ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+# دالة تشغيل الخادم المحلي
+def start_stand_in(fixtures):
+    """تشغيل الخادم في خيط خلفي وإرجاع عنوانه الأساسي"""
+    StandInHandler.fixtures = {fixture['name']: fixture['content'].encode('utf-8') for fixture in fixtures}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+# دالة تفريغ ذاكرات النواة حتى يقاس كل تكرار من البداية
+def reset_caches():
+    core.tokenize_text.cache_clear()
+    core.rank_sentences.cache_clear()
+    core.get_translation_cache.cache_clear()
+
+# دالة قياس دالة واحدة
+def measure(fn, repeat, memory=True):
+    """أفضل زمن ووسيطه على repeat تكرارات، ثم ذروة الذاكرة (tracemalloc) في تشغيل منفصل"""
+    times = []
+    for _ in range(repeat):
+        reset_caches()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        reset_caches()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {'best': round(min(times), 6), 'median': round(statistics.median(times), 6), 'peak_bytes': peak}
+
+# دالة تحليل ملف نص حسب صيغته
+def parse_fixture(fixture):
+    if fixture['ext'] in core.STRUCTURED_SUBTITLE_FORMATS:
+        return list(core.parse_structured_subtitle(fixture['content'].encode('utf-8'), fixture['ext']))
+    return core.parse_subtitle_content(fixture['content'], fixture['auto'])
+
+# دالة قياس كل المسارات لملف نص واحد
+def bench_fixture(fixture, base_url, repeat, memory, translate=True):
+    """قائمة نتائج {'case', ...} لملف واحد"""
+    transcript = core.Transcript.from_segments(parse_fixture(fixture))
+    full_text = transcript.full_text
+    analysis = core.analyze_text(full_text)
+    video_info = {'title': fixture['name'], 'uploader': 'bench', 'duration': (fixture['minutes'] or 0) * 60, 'view_count': 0}
+    index = core.TranscriptIndex(transcript)
+
+    cases = [
+        ('parse', lambda: parse_fixture(fixture)),
+        ('download', lambda: core.fetch_subtitle_transcript(f"{base_url}/sub/{fixture['name']}", fixture['auto'], fixture['ext'])),
+        ('format', lambda: core.format_transcript(transcript)),
+        ('analyze', lambda: core.analyze_text(full_text)),
+        ('summarize', lambda: core.summarize_text_free(full_text, 5)),
+        ('index', lambda: core.TranscriptIndex(transcript)),
+        ('search', lambda: [core.search_in_text(full_text, query, index=index) for query in SEARCH_QUERIES]),
+        ('export_report', lambda: core.create_advanced_export(transcript, full_text, video_info, analysis, 'en')),
+        ('export_srt', lambda: core.segments_to_srt(transcript)),
+    ]
+    if translate:
+        cases.append(('translate', lambda: core.translate_text_free(full_text, 'ar')))
+
+    results = []
+    for case, fn in cases:
+        result = measure(fn, repeat, memory)
+        result.update(case=case, fixture=fixture['name'], minutes=fixture['minutes'], kind=fixture['kind'],
+                      ext=fixture['ext'], segments=len(transcript), bytes=len(fixture['content'].encode('utf-8')))
+        results.append(result)
+        print(f"{fixture['name']:<22} {case:<14} {result['best'] * 1000:>10.2f} ms"
+              + (f" {result['peak_bytes'] / 1024:>10.0f} KiB" if result['peak_bytes'] is not None else ''),
+              file=sys.stderr)
+    return results
+
+# دالة وصف بيئة القياس
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+# دالة مقارنة نتيجتين
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """طباعة نسبة الزمن لكل حالة مشتركة؛ ترجع قائمة التراجعات (أبطأ من 1 + threshold)"""
+    old = {(result['fixture'], result['case']): result for result in baseline['results']}
+    regressions = []
+
+    print(f"{'fixture':<22} {'case':<14} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for result in current['results']:
+        key = (result['fixture'], result['case'])
+        if key not in old or not old[key]['best']:
+            continue
+        ratio = result['best'] / old[key]['best']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ⚠️'
+            regressions.append((key, ratio))
+        print(f"{key[0]:<22} {key[1]:<14} {old[key]['best'] * 1000:>10.2f} {result['best'] * 1000:>10.2f} {ratio:>7.2f}{flag}")
+
+    return regressions
+
+# الدالة الرئيسية
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_pipeline', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="أطوال النصوص بالدقائق، مثل 10,60,600")
+    parser.add_argument('--repeat', type=int, default=3, help="عدد التكرارات لكل حالة (يُؤخذ الأفضل)")
+    parser.add_argument('--no-memory', action='store_true', help="تخطي قياس الذاكرة بـ tracemalloc")
+    parser.add_argument('--no-translate', action='store_true', help="تخطي قياس الترجمة")
+    parser.add_argument('--output', help="ملف النتائج (الافتراضي benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', help="ملف نتائج سابق للمقارنة")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="نسبة التباطؤ المسموحة عند المقارنة")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    fixtures = synthetic_fixtures(sizes) + recorded_fixtures()
+    base_url = start_stand_in(fixtures)
+    core.TRANSLATE_URL = f"{base_url}/translate"
+
+    results = []
+    for fixture in fixtures:
+        results.extend(bench_fixture(fixture, base_url, args.repeat, not args.no_memory, not args.no_translate))
+
+    report = {'environment': environment(), 'sizes': sizes, 'repeat': args.repeat, 'results': results}
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{report['environment']['commit'] or 'local'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"النتائج: {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"⚠️ {len(regressions)} حالة أبطأ من الحد المسموح", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
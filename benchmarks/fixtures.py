@@ -0,0 +1,131 @@
+"""ملفات نصوص اصطناعية (VTT وjson3، يدوية وتلقائية) بأطوال من دقائق إلى ساعات، ونصوص مسجلة اختيارية
+
+المولدات حتمية (بذرة ثابتة) حتى تكون نتائج القياس قابلة للمقارنة بين الإصدارات.
+"""
+import glob
+import json
+import os
+import random
+
+# مجلد النصوص المسجلة الاختيارية (*.vtt / *.json3 تُوضع يدوياً)
+RECORDED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recorded')
+
+# مفردات النص الاصطناعي: كلمات شائعة كثيرة التكرار وذيل طويل من الكلمات النادرة
+COMMON_WORDS = ('the', 'and', 'to', 'of', 'a', 'in', 'is', 'that', 'it', 'we', 'you', 'this', 'so', 'what',
+                'data', 'model', 'python', 'function', 'value', 'learning', 'network', 'training', 'example')
+RARE_WORDS = tuple(f"term{index}" for index in range(5000))
+
+# متوسط طول المقطع اليدوي والتلقائي (بالثواني)
+MANUAL_CUE_SECONDS = 3.0
+AUTO_CUE_SECONDS = 2.0
+
+# دالة توليد جمل عشوائية حتمية
+def iter_sentences(seed):
+    """جمل من 4 إلى 14 كلمة تنتهي بعلامة ترقيم"""
+    rng = random.Random(seed)
+    while True:
+        words = [rng.choice(COMMON_WORDS) if rng.random() < 0.7 else rng.choice(RARE_WORDS)
+                 for _ in range(rng.randint(4, 14))]
+        yield ' '.join(words).capitalize() + rng.choice('..?!')
+
+# دالة تنسيق الوقت لملفات VTT
+def vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+# دالة توليد ملف VTT يدوي
+def make_manual_vtt(minutes, seed=1):
+    """مقطع لكل جملة، بلا تكرار"""
+    sentences = iter_sentences(seed)
+    blocks = ["WEBVTT\nKind: captions\nLanguage: en\n"]
+    start = 0.0
+    while start < minutes * 60:
+        blocks.append(f"{vtt_time(start)} --> {vtt_time(start + MANUAL_CUE_SECONDS)}\n{next(sentences)}\n")
+        start += MANUAL_CUE_SECONDS
+    return '\n'.join(blocks)
+
+# دالة توليد ملف VTT تلقائي بأسلوب يوتيوب
+def make_auto_vtt(minutes, seed=2):
+    """أسطر متدحرجة: كل مقطع يكرر السطر السابق ثم يضيف سطراً جديداً بتوقيت لكل كلمة،
+    يتبعه مقطع انتقالي قصير (10ms) يحمل السطر الجديد فقط، كما في نصوص يوتيوب التلقائية"""
+    sentences = iter_sentences(seed)
+    blocks = ["WEBVTT\nKind: captions\nLanguage: en\n"]
+    previous = ''
+    start = 0.0
+    while start < minutes * 60:
+        words = next(sentences).rstrip('.?!').lower().split()
+        step = AUTO_CUE_SECONDS / len(words)
+        timed = words[0] + ''.join(
+            f"<{vtt_time(start + step * index)}><c> {word}</c>" for index, word in enumerate(words[1:], 1)
+        )
+        end = start + AUTO_CUE_SECONDS
+        blocks.append(f"{vtt_time(start)} --> {vtt_time(end)} align:start position:0%\n{previous}\n{timed}\n")
+        plain = ' '.join(words)
+        blocks.append(f"{vtt_time(end)} --> {vtt_time(end + 0.01)} align:start position:0%\n{plain}\n \n")
+        previous = plain
+        start = end + 0.01
+    return '\n'.join(blocks)
+
+# دالة توليد ملف json3
+def make_json3(minutes, auto=False, seed=3):
+    """أحداث json3 بأوقات بالميلي ثانية؛ التلقائي يقسم الجملة إلى مقاطع كلمات بإزاحات"""
+    sentences = iter_sentences(seed)
+    cue_ms = int((AUTO_CUE_SECONDS if auto else MANUAL_CUE_SECONDS) * 1000)
+    events = []
+    start = 0
+    while start < minutes * 60000:
+        sentence = next(sentences)
+        if auto:
+            words = sentence.rstrip('.?!').lower().split()
+            step = cue_ms // len(words)
+            segs = [{'utf8': (' ' if index else '') + word, 'tOffsetMs': step * index}
+                    for index, word in enumerate(words)]
+            events.append({'tStartMs': start, 'dDurationMs': cue_ms, 'wWinId': 1, 'segs': segs})
+            events.append({'tStartMs': start + cue_ms, 'wWinId': 1, 'aAppend': 1, 'segs': [{'utf8': '\n'}]})
+        else:
+            events.append({'tStartMs': start, 'dDurationMs': cue_ms, 'segs': [{'utf8': sentence}]})
+        start += cue_ms
+    return json.dumps({'wireMagic': 'pb3', 'events': events}, ensure_ascii=False)
+
+# دالة بناء مجموعة النصوص الاصطناعية
+def synthetic_fixtures(sizes):
+    """[{'name','minutes','kind','ext','auto','content'}] لكل طول: VTT يدوي وتلقائي وjson3 يدوي وتلقائي"""
+    fixtures = []
+    for minutes in sizes:
+        for kind, ext, auto, build in (
+            ('manual', 'vtt', False, make_manual_vtt),
+            ('auto', 'vtt', True, make_auto_vtt),
+            ('manual', 'json3', False, lambda m: make_json3(m, auto=False)),
+            ('auto', 'json3', True, lambda m: make_json3(m, auto=True)),
+        ):
+            fixtures.append({
+                'name': f"{kind}-{minutes}m.{ext}",
+                'minutes': minutes,
+                'kind': kind,
+                'ext': ext,
+                'auto': auto,
+                'content': build(minutes)
+            })
+    return fixtures
+
+# دالة تحميل النصوص المسجلة
+def recorded_fixtures(directory=RECORDED_DIR):
+    """ملفات مسجلة من يوتيوب؛ 'auto' في اسم الملف يعني نصاً تلقائياً"""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.vtt')) + glob.glob(os.path.join(directory, '*.json3'))):
+        name = os.path.basename(path)
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        auto = 'auto' in name
+        fixtures.append({
+            'name': name,
+            'minutes': None,
+            'kind': 'auto' if auto else 'manual',
+            'ext': name.rsplit('.', 1)[1],
+            'auto': auto,
+            'content': content
+        })
+    return fixtures
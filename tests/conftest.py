@@ -0,0 +1,11 @@
+"""إعداد مشترك للاختبارات: ذاكرة مؤقتة معزولة قبل استيراد النواة"""
+import os
+import sys
+import tempfile
+
+# جذر المستودع لاستيراد transcript_core دون تثبيت
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# قواعد بيانات في الذاكرة ومجلد تصدير مؤقت حتى لا تلمس الاختبارات ملفات المستخدم
+os.environ['TRANSCRIPT_CACHE_PATH'] = ':memory:'
+os.environ.setdefault('TRANSCRIPT_EXPORT_DIR', tempfile.mkdtemp(prefix='transcript-tests-'))
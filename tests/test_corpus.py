@@ -0,0 +1,59 @@
+"""اختبارات البحث الشامل: تحويل الاستعلام إلى تعبير FTS5 والبحث في فهرس بالذاكرة"""
+import pytest
+
+import transcript_core as core
+
+
+@pytest.mark.parametrize('query, expression', [
+    ('machine lea', '"machine" AND "lea"*'),
+    ('"a b" c', '"a b" AND "c"*'),
+    ('"exact phrase"', '"exact phrase"'),
+    # علامة تنصيص دون إغلاق أثناء الكتابة: كلماتها عادية وآخرها بادئة
+    ('"machine lea', '"machine" AND "lea"*'),
+    ('Machine', '"machine"*'),
+    ('', ''),
+    ('"" ', ''),
+])
+def test_match_expression_quoting(query, expression):
+    assert core.corpus_match_expression(query) == expression
+
+
+def test_match_expression_quotes_fts_syntax():
+    # رموز FTS5 من المستخدم لا تصل إلى المحلل كصيغة
+    assert core.corpus_match_expression('NEAR(a b) OR c* -d') == '"near" AND "a" AND "b" AND "or" AND "c" AND "d"*'
+    assert core.corpus_match_expression('col:text ^x') == '"col" AND "text" AND "x"*'
+
+
+def test_match_expression_strips_diacritics():
+    # دون حذف التشكيل تصبح 'كَتَبَ' حروفاً منفصلة
+    assert core.corpus_match_expression('كَتَبَ') == '"كتب"*'
+    assert core.corpus_match_expression('"كَتَبَ الطالبُ"') == '"كتب الطالب"'
+
+
+def test_corpus_search_finds_vocalized_and_plain_text():
+    corpus = core.CorpusIndex(':memory:')
+    corpus.ingest('vid1', core.Transcript.from_segments([
+        {'start': 0.0, 'text': 'كَتَبَ الطالبُ الدرسَ'},
+        {'start': 5.0, 'text': 'machine learning basics'},
+    ]), {'title': 'First', 'uploader': 'A'})
+    corpus.ingest('vid2', core.Transcript.from_segments([
+        {'start': 12.0, 'text': 'كتب المعلم'},
+    ]), {'title': 'Second', 'uploader': 'B'})
+    
+    result = corpus.search('كَتَبَ ')
+    assert sorted(hit['video_id'] for hit in result['results']) == ['vid1', 'vid2']
+    assert corpus.search('كتب', uploader='B')['total'] == 1
+    
+    hit = corpus.search('"machine lea')['results'][0]
+    assert (hit['video_id'], hit['timestamp']) == ('vid1', 5.0)
+    assert '**machine**' in hit['text']
+    # استعلام بصيغة FTS5 خاطئة لا يرفع استثناء
+    assert corpus.search('"')['total'] == 0
+    assert corpus.stats() == {'videos': 2, 'segments': 3}
+
+
+def test_corpus_ingest_skips_unchanged_content():
+    corpus = core.CorpusIndex(':memory:')
+    transcript = core.Transcript.from_segments([{'start': 0.0, 'text': 'hello'}])
+    assert corpus.ingest('vid', transcript) is True
+    assert corpus.ingest('vid', transcript) is False
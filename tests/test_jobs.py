@@ -0,0 +1,95 @@
+"""اختبارات طابور المهام الخلفية: ترتيب الأولويات والإلغاء والحذف"""
+import threading
+import time
+
+import transcript_core as core
+
+# أقصى انتظار لانتهاء مهمة في الاختبار (بالثواني)
+WAIT_SECONDS = 5
+
+
+def wait_for(jobs, job_id, states=('done', 'error', 'cancelled')):
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        snapshot = jobs.get(job_id)
+        if snapshot['status'] in states:
+            return snapshot
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {jobs.get(job_id)['status']}")
+
+
+def blocked_queue():
+    """طابور بخيط واحد مشغول بمهمة تنتظر الإشارة، فتبقى المهام التالية في الطابور"""
+    jobs = core.JobQueue(max_workers=1)
+    release = threading.Event()
+    blocker = jobs.submit('block', release.wait, WAIT_SECONDS)
+    wait_for(jobs, blocker, states=('running',))
+    return jobs, release, blocker
+
+
+def test_higher_priority_runs_first():
+    jobs, release, blocker = blocked_queue()
+    order = []
+    low = jobs.submit('low', order.append, 'low', priority=core.JOB_PRIORITY_LOW)
+    normal = jobs.submit('normal', order.append, 'normal')
+    high = jobs.submit('high', order.append, 'high', priority=core.JOB_PRIORITY_HIGH)
+    
+    assert jobs.get(high)['position'] == 1
+    assert jobs.get(low)['position'] == 3
+    
+    release.set()
+    for job_id in (blocker, low, normal, high):
+        wait_for(jobs, job_id)
+    assert order == ['high', 'normal', 'low']
+
+
+def test_cancel_queued_job_never_runs():
+    jobs, release, blocker = blocked_queue()
+    ran = []
+    queued = jobs.submit('queued', ran.append, 'queued')
+    after = jobs.submit('after', ran.append, 'after')
+    
+    assert jobs.cancel(queued) is True
+    assert jobs.get(queued)['status'] == 'cancelled'
+    # المهمة الجارية لا تُلغى
+    assert jobs.cancel(blocker) is False
+    
+    release.set()
+    assert wait_for(jobs, after)['status'] == 'done'
+    assert ran == ['after']
+    assert jobs.get(queued)['status'] == 'cancelled'
+    assert jobs.cancel(after) is False
+    assert jobs.cancel('missing') is False
+
+
+def test_progress_errors_and_forget():
+    jobs = core.JobQueue(max_workers=1)
+    
+    def report(on_progress):
+        on_progress('status', 'step 1')
+        on_progress('status', 'step 2')
+        on_progress('info', 'kept')
+        return 42
+    
+    done = wait_for(jobs, jobs.submit('report', report, progress=True))
+    assert done['result'] == 42
+    assert done['partial'] == {'status': 'step 2'}
+    assert done['messages'] == [('info', 'kept')]
+    
+    failed = wait_for(jobs, jobs.submit('fail', lambda: 1 / 0))
+    assert failed['status'] == 'error'
+    assert 'division' in failed['error']
+    
+    assert jobs.forget(done['id']) is True
+    assert jobs.get(done['id']) is None
+    assert jobs.forget(done['id']) is False
+
+
+def test_forget_keeps_active_jobs():
+    jobs, release, blocker = blocked_queue()
+    queued = jobs.submit('queued', lambda: None)
+    assert jobs.forget(blocker) is False
+    assert jobs.forget(queued) is False
+    release.set()
+    wait_for(jobs, queued)
+    assert jobs.forget(queued) is True
@@ -0,0 +1,110 @@
+"""اختبارات تحليل ملفات SRT و VTT و json3 و srv3 وحذف تكرار النصوص التلقائية"""
+import json
+
+import transcript_core as core
+
+# ملف SRT بفاصلة قبل الميلي ثانية وعلامات HTML
+SRT_CONTENT = """1
+00:00:01,500 --> 00:00:03,250
+<i>Hello</i> world
+
+2
+00:01:02,000 --> 00:01:04,000
+second line
+"""
+
+# ملف VTT برأس Kind و Language وإعدادات بعد التوقيت
+VTT_CONTENT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+first cue
+
+NOTE comment
+
+01:00:00.250 --> 01:00:01.000
+late cue
+"""
+
+# نص يوتيوب تلقائي: كل سطر يتكرر في المقطع التالي، والسطر الجديد يحمل أوقات الكلمات
+AUTO_VTT_CONTENT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+hello<00:00:00.500><c> there</c><00:00:01.000><c> friend</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+hello there friend
+
+00:00:02.010 --> 00:00:04.000 align:start position:0%
+hello there friend
+how<00:00:02.500><c> are</c><00:00:03.000><c> you</c>
+
+00:00:04.000 --> 00:00:04.010 align:start position:0%
+how are you
+"""
+
+
+def test_parse_time_to_seconds_keeps_milliseconds():
+    assert core.parse_time_to_seconds('00:00:01,500') == 1.5
+    assert core.parse_time_to_seconds('01:02:03.250') == 3723.25
+    assert core.parse_time_to_seconds('02:03.5') == 123.5
+
+
+def test_parse_srt():
+    segments = core.parse_subtitle_content(SRT_CONTENT)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [
+        (1.5, 3.25, 'Hello world'),
+        (62.0, 64.0, 'second line'),
+    ]
+
+
+def test_parse_vtt_skips_header_and_notes():
+    segments = core.parse_subtitle_content(VTT_CONTENT)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [
+        (0.0, 2.0, 'first cue'),
+        (3600.25, 3601.0, 'late cue'),
+    ]
+
+
+def test_auto_captions_collapse_rolling_lines():
+    segments = core.parse_subtitle_content(AUTO_VTT_CONTENT, auto_captions=True)
+    assert [s['text'] for s in segments] == ['hello there friend', 'how are you']
+    assert segments[0]['words'] == [(0.0, 'hello'), (0.5, 'there'), (1.0, 'friend')]
+    assert segments[1]['start'] == 2.01
+    assert segments[1]['words'][0] == (2.01, 'how')
+
+
+def test_manual_captions_keep_repeated_lines():
+    # الأسطر المكررة في النصوص اليدوية كلام حقيقي ولا تُحذف
+    content = "1\n00:00:00,000 --> 00:00:01,000\nyes\n\n2\n00:00:01,000 --> 00:00:02,000\nyes\n"
+    assert [s['text'] for s in core.parse_subtitle_content(content)] == ['yes', 'yes']
+
+
+def test_parse_json3_with_word_offsets():
+    data = {'events': [
+        {'tStartMs': 1200, 'dDurationMs': 800, 'segs': [{'utf8': 'good'}, {'utf8': ' morning', 'tOffsetMs': 400}]},
+        {'tStartMs': 2000, 'aAppend': 1, 'segs': [{'utf8': '\n'}]},
+        {'tStartMs': 2000, 'dDurationMs': 1000},
+        {'tStartMs': 3000, 'dDurationMs': 500, 'segs': [{'utf8': 'bye'}]},
+    ]}
+    segments = core.parse_structured_subtitle(json.dumps(data).encode(), 'json3')
+    assert segments == [
+        {'start': 1.2, 'end': 2.0, 'text': 'good morning', 'words': [(1.2, 'good'), (1.6, 'morning')]},
+        {'start': 3.0, 'end': 3.5, 'text': 'bye'},
+    ]
+
+
+def test_parse_srv3_with_word_offsets():
+    content = (b'<timedtext format="3"><body>'
+               b'<p t="1500" d="1000"><s>one</s><s t="300"> two</s></p>'
+               b'<p t="4000" d="250">three</p>'
+               b'<p t="5000" d="100"></p>'
+               b'</body></timedtext>')
+    segments = core.parse_structured_subtitle(content, 'srv3')
+    assert segments == [
+        {'start': 1.5, 'end': 2.5, 'text': 'one two', 'words': [(1.5, 'one'), (1.8, 'two')]},
+        {'start': 4.0, 'end': 4.25, 'text': 'three'},
+    ]
@@ -0,0 +1,79 @@
+"""اختبارات فهرس البحث في نص الفيديو: العبارات والبادئات والتشكيل العربي"""
+import transcript_core as core
+
+# مقاطع قصيرة، والعبارة "machine learning" تمتد عبر حدود المقطعين الثاني والثالث
+SEGMENTS = [
+    {'start': 0.0, 'end': 2.0, 'text': 'we study machine learning today'},
+    {'start': 2.0, 'end': 4.0, 'text': 'learning about the machine'},
+    {'start': 4.0, 'end': 6.0, 'text': 'learning never stops'},
+    {'start': 6.0, 'end': 8.0, 'text': 'machines and learners'},
+]
+
+# نص عربي مشكول وغير مشكول
+ARABIC_SEGMENTS = [
+    {'start': 0.0, 'end': 2.0, 'text': 'كَتَبَ الطالبُ الدرسَ'},
+    {'start': 2.0, 'end': 4.0, 'text': 'كتب المعلم على السبورة'},
+    {'start': 4.0, 'end': 6.0, 'text': 'قرأ الكتاب'},
+]
+
+
+def segments_of(result):
+    return sorted(hit['segment'] for hit in result['results'])
+
+
+def test_phrase_matches_across_segments():
+    index = core.TranscriptIndex(SEGMENTS)
+    result = index.search('"machine learning"')
+    assert segments_of(result) == [0, 1]
+    # المطابقة الممتدة تعرض نص المقطعين معاً
+    spanning = next(hit for hit in result['results'] if hit['segment'] == 1)
+    assert spanning['text'].endswith('**machine** **learning** never stops')
+
+
+def test_exact_phrase_requires_adjacent_words():
+    index = core.TranscriptIndex(SEGMENTS)
+    assert index.search('"learning machine"')['total'] == 0
+    # دون علامتي تنصيص يكفي أن يحتوي المقطع الكلمتين
+    assert 1 in segments_of(index.search('learning machine '))
+
+
+def test_phrase_ranks_above_scattered_words():
+    index = core.TranscriptIndex(SEGMENTS)
+    result = index.search('machine learning ')
+    assert result['results'][0]['segment'] == 0
+
+
+def test_last_word_is_prefix_unless_query_ends_with_space():
+    index = core.TranscriptIndex(SEGMENTS)
+    assert segments_of(index.search('mach')) == [0, 1, 3]
+    assert index.search('mach ')['total'] == 0
+    assert segments_of(index.search('machine ')) == [0, 1]
+    assert '**machines**' in index.search('machine')['results'][-1]['text']
+
+
+def test_no_result_cap():
+    index = core.TranscriptIndex([{'start': float(i), 'text': 'repeat'} for i in range(150)])
+    result = index.search('repeat', page_size=20)
+    assert result['total'] == 150
+    assert result['pages'] == 8
+    assert len(index.search('repeat', page=7, page_size=20)['results']) == 10
+
+
+def test_vocalized_arabic_matches_plain_and_back():
+    index = core.TranscriptIndex(ARABIC_SEGMENTS)
+    assert segments_of(index.search('كتب ')) == [0, 1]
+    assert segments_of(index.search('كَتَبَ ')) == [0, 1]
+    assert segments_of(index.search('"كَتَبَ الطالب"')) == [0]
+
+
+def test_arabic_highlight_keeps_diacritics():
+    index = core.TranscriptIndex(ARABIC_SEGMENTS)
+    result = index.search('كتب ')
+    texts = {hit['segment']: hit['text'] for hit in result['results']}
+    assert texts[0] == '**كَتَبَ** الطالبُ الدرسَ'
+    assert texts[1] == '**كتب** المعلم على السبورة'
+
+
+def test_arabic_prefix():
+    index = core.TranscriptIndex(ARABIC_SEGMENTS)
+    assert segments_of(index.search('الكت')) == [2]
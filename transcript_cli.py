@@ -0,0 +1,219 @@
+"""واجهة سطر الأوامر لـ YouTube Transcript Pro دون Streamlit
+
+الاستخدام:
+    python -m transcript_cli https://www.youtube.com/watch?v=... --format srt -o out.srt
+    python -m transcript_cli https://www.youtube.com/playlist?list=... --workers 8 -o batch.jsonl
+    python -m transcript_cli --search "machine learning" -n 50
+"""
+import argparse
+import json
+import os
+import sys
+
+from transcript_core import (
+    BATCH_MAX_VIDEOS,
+    BATCH_MAX_WORKERS,
+    extract_video_id,
+    is_collection_url,
+    expand_collection,
+    extract_video_data,
+    fetch_subtitle_languages,
+    run_extraction,
+    run_batch,
+    iter_batch_jsonl,
+    summarize_text_free,
+    get_corpus_index,
+    CORPUS_PAGE_SIZE,
+    EXPORT_FORMATS,
+    enable_trace_log,
+    write_metrics_file,
+)
+
+# صيغ الإخراج المدعومة لفيديو واحد: اسم الخيار ← صيغة EXPORT_FORMATS (json تُبنى هنا)
+OUTPUT_FORMATS = {
+    'text': 'txt',
+    'timed': 'timed.txt',
+    'srt': 'srt',
+    'vtt': 'vtt',
+    'jsonl': 'jsonl',
+    'md': 'md',
+    'json': None
+}
+
+# دالة طباعة رسائل التقدم على stderr
+def print_progress(kind, message):
+    """مستمع تقدم نصي: الرسائل الدائمة وسطر الحالة فقط، دون المعاينة"""
+    if kind in ('info', 'success', 'warning', 'error', 'status'):
+        print(message, file=sys.stderr)
+
+# دالة تحويل نتيجة فيديو واحد إلى الصيغة المطلوبة
+def render_output(result, output_format, summary_sentences=0, tracks=None):
+    """مولد قطع الإخراج لنتيجة run_extraction (tracks: {اللغة: Transcript أو استثناء} لإخراج json)"""
+    transcript_data = result['transcript_data']
+
+    export_format = OUTPUT_FORMATS[output_format]
+    if export_format:
+        _, writer = EXPORT_FORMATS[export_format]
+        yield from writer(transcript_data, result)
+        return
+
+    data = {
+        'video_id': result['video_id'],
+        'language': result['language'],
+        'video_info': result['video_info'],
+        'analysis': result['analysis'],
+        'asr': result.get('asr'),
+        'segments': transcript_data.to_list()
+    }
+    if summary_sentences:
+        data['summary'] = summarize_text_free(transcript_data.full_text, summary_sentences)
+    if tracks:
+        data['tracks'] = {
+            lang: track.to_list() if not isinstance(track, Exception) else {'error': str(track)}
+            for lang, track in tracks.items()
+        }
+    yield json.dumps(data, ensure_ascii=False, indent=2) + '\n'
+
+# دالة كتابة الإخراج إلى ملف أو stdout
+def write_output(chunks, path):
+    """كتابة قطع النص بالتدفق إلى المسار المحدد، أو إلى stdout عند '-'"""
+    if path == '-':
+        try:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # المستقبل أغلق الأنبوب (مثل head): نتوقف بهدوء دون خطأ عند الخروج
+            sys.stdout = open(os.devnull, 'w')
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+# دالة تحويل نتائج البحث الشامل إلى أسطر إخراج
+def render_search(search, output_format):
+    """سطر JSON لكل نتيجة لصيغتي json/jsonl، وإلا سطر نصي بالوقت والعنوان والرابط ثم المقتطف"""
+    for hit in search['results']:
+        if output_format in ('json', 'jsonl'):
+            yield json.dumps(hit, ensure_ascii=False) + '\n'
+        else:
+            yield f"[{hit['time']}] {hit['title']} — {hit['url']}\n    {hit['text']}\n"
+
+# دالة تجميع الفيديوهات من الروابط (فيديوهات مفردة وقوائم تشغيل وقنوات)
+def collect_videos(urls, limit, on_progress=None):
+    """إرجاع قائمة {'id','url','title'} بلا تكرار بترتيب الروابط"""
+    videos = []
+    seen = set()
+
+    for url in urls:
+        if is_collection_url(url) and not extract_video_id(url):
+            title, entries = expand_collection(url, limit)
+            if on_progress:
+                on_progress('info', f"📋 {title}: {len(entries)} فيديو")
+        else:
+            video_id = extract_video_id(url)
+            if not video_id:
+                raise ValueError(f"رابط غير صحيح: {url}")
+            entries = [{'id': video_id, 'url': url, 'title': video_id}]
+
+        for entry in entries:
+            if entry['id'] not in seen:
+                seen.add(entry['id'])
+                videos.append(entry)
+
+    return videos
+
+# دالة بناء محلل المعاملات
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m transcript_cli',
+        description="استخراج نصوص اليوتيوب وتحليلها من سطر الأوامر"
+    )
+    parser.add_argument('urls', nargs='*', help="رابط فيديو أو قائمة تشغيل أو قناة (واحد أو أكثر)")
+    parser.add_argument('-f', '--format', choices=list(OUTPUT_FORMATS), default='text',
+                        help="صيغة الإخراج لفيديو واحد (الدفعات تُكتب دائماً بصيغة JSONL)")
+    parser.add_argument('-o', '--output', default='-', help="ملف الإخراج (الافتراضي stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=BATCH_MAX_WORKERS, help="عدد العمليات المتوازية للدفعات")
+    parser.add_argument('--limit', type=int, default=BATCH_MAX_VIDEOS, help="الحد الأقصى لفيديوهات كل قائمة أو قناة")
+    parser.add_argument('-l', '--lang', default='', help="لغات النص المفضلة بالترتيب، مثل ar,en")
+    parser.add_argument('--tracks', default='', help="لغات إضافية تُحمل معاً وتُضاف لإخراج json، مثل ar,fr")
+    parser.add_argument('--summary', type=int, default=0, metavar='N', help="إضافة ملخص من N جمل لإخراج json")
+    parser.add_argument('-q', '--quiet', action='store_true', help="إخفاء رسائل التقدم")
+    parser.add_argument('-s', '--search', metavar='QUERY', help="البحث في كل النصوص المستخرجة سابقاً بدلاً من الاستخراج")
+    parser.add_argument('-n', '--hits', type=int, default=CORPUS_PAGE_SIZE, help="عدد نتائج البحث الشامل")
+    parser.add_argument('--channel', help="قصر البحث الشامل على قناة واحدة")
+    parser.add_argument('--trace', action='store_true', help="سطر JSON بأزمنة المراحل لكل طلب على stderr")
+    parser.add_argument('--metrics', metavar='FILE', help="كتابة المقاييس المجمعة بصيغة Prometheus عند الانتهاء")
+    return parser
+
+# الدالة الرئيسية لسطر الأوامر
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.urls and not args.search:
+        parser.error("ضع رابطاً واحداً على الأقل أو استخدم --search")
+    if args.trace:
+        enable_trace_log()
+    try:
+        return run(args)
+    finally:
+        if args.metrics:
+            write_metrics_file(args.metrics)
+
+# دالة تنفيذ الأمر بعد تحليل المعاملات
+def run(args):
+    on_progress = None if args.quiet else print_progress
+    # البحث الشامل في الفهرس المحلي دون أي اتصال بالشبكة
+    if args.search:
+        search = get_corpus_index().search(args.search, page_size=args.hits, uploader=args.channel)
+        if on_progress:
+            on_progress('info', f"🔍 {search['total']} نتيجة في {search['seconds']} ث")
+        write_output(render_search(search, args.format), args.output)
+        return 0 if search['results'] else 1
+    
+    preferred_langs = tuple(lang.strip() for lang in args.lang.split(',') if lang.strip())
+    extra_langs = [lang.strip() for lang in args.tracks.split(',') if lang.strip()]
+
+    # فيديو واحد: نفس مسار الواجهة مع إخراج بالصيغة المطلوبة
+    if len(args.urls) == 1 and extract_video_id(args.urls[0]):
+        url = args.urls[0]
+        want_tracks = bool(extra_langs) and args.format == 'json'
+        result = run_extraction(url, extract_video_id(url), on_progress, preferred_langs, keep_tracks=want_tracks)
+        if not result:
+            print("⚠️ لا توجد نصوص متاحة لهذا الفيديو", file=sys.stderr)
+            return 1
+        
+        tracks = None
+        if want_tracks:
+            # جداول المسارات من الاستخراج نفسه؛ الذاكرة المؤقتة لا تحفظها فتُطلب عندها فقط
+            video_data = result.pop('subtitle_tables', None) or extract_video_data(url, on_progress)
+            tracks = fetch_subtitle_languages(video_data, extra_langs) if video_data else None
+        write_output(render_output(result, args.format, args.summary, tracks), args.output)
+        return 0
+
+    # دفعة: قوائم تشغيل أو قنوات أو عدة روابط
+    try:
+        videos = collect_videos(args.urls, args.limit, on_progress)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    done = 0
+
+    def on_video(index, record):
+        nonlocal done
+        done += 1
+        if on_progress:
+            status = '✅' if record['status'] == 'ok' else f"❌ {record['error']}"
+            on_progress('status', f"[{done}/{len(videos)}] {record['id']} {status} ({record['seconds']} ث)")
+
+    records = run_batch(videos, args.workers, on_video, preferred_langs)
+    write_output(iter_batch_jsonl(records), args.output)
+
+    failed = sum(1 for record in records if record['status'] != 'ok')
+    if on_progress:
+        on_progress('info', f"🎉 تم استخراج {len(records) - failed} من {len(records)} فيديو")
+    return 1 if failed == len(records) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3036 @@
+"""نواة YouTube Transcript Pro: الاستخراج والتحليل والترجمة والبحث والتخزين دون Streamlit
+
+المكتبات الثقيلة (yt_dlp وrequests وnumpy) تُستورد عند أول استخدام فقط، والرسائل تمر
+عبر دالة on_progress اختيارية بدلاً من عناصر الواجهة.
+"""
+import re
+import json
+import xml.etree.ElementTree as ET
+from collections import Counter
+import time
+import os
+import sqlite3
+import threading
+from collections import deque
+from bisect import bisect_left, bisect_right
+import heapq
+from functools import lru_cache
+import math
+from array import array
+import hashlib
+import unicodedata
+import logging
+import tracemalloc
+import contextvars
+import uuid
+import queue
+import itertools
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, Future, CancelledError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# محلل JSON أسرع إن كان مثبتاً
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# عدد النتائج المحفوظة لكل دالة مخزنة مؤقتاً حسب المحتوى
+CACHE_MAX_ENTRIES = 64
+
+# دالة إرسال رسالة تقدم إلى المستمع إن وُجد
+def report(on_progress, kind, message):
+    """on_progress(kind, message) حيث kind أحد: info/success/warning/error للرسائل الدائمة،
+    status/preview لسطر الحالة ومعاينة النص المؤقتين، وclear لإخفائهما، وtrace لقاموس مراحل الطلب"""
+    if on_progress:
+        on_progress(kind, message)
+
+# إعدادات القياس: عدد العينات الأخيرة لكل مرحلة لحساب النسب المئوية، والنسب المعروضة
+METRICS_WINDOW = 1024
+METRICS_QUANTILES = (0.5, 0.95)
+
+# تتبع ذروة الذاكرة لكل مرحلة (tracemalloc يبطئ كل التخصيصات، لذا يُفعل عند الطلب فقط)
+METRICS_TRACE_MEMORY = os.environ.get('TRANSCRIPT_TRACE_MEMORY') == '1'
+
+# ملف نصي بصيغة Prometheus يُحدث بعد كل طلب (لـ textfile collector في node_exporter)
+METRICS_FILE = os.environ.get('TRANSCRIPT_METRICS_FILE')
+
+# سجل الأخطاء غير القاتلة (الذاكرة المؤقتة والفهرسة)، وسجل الطلبات المنظم: سطر JSON واحد لكل طلب
+logger = logging.getLogger('transcript_core')
+trace_logger = logging.getLogger('transcript_core.trace')
+
+# الطلب والمرحلة الجارية في الخيط أو السياق الحالي؛ المرحلة إطار {'span', 'baseline', 'peak', 'parent'}
+# يشير إلى الإطار الأب فتُكوّن المراحل المتداخلة مكدساً
+CURRENT_TRACE = contextvars.ContextVar('transcript_trace', default=None)
+CURRENT_STAGE = contextvars.ContextVar('transcript_stage', default=None)
+
+# دالة تفعيل كتابة سجل الطلبات إلى stderr
+def enable_trace_log(stream=None):
+    """إضافة معالج يكتب أسطر JSON كما هي (مرة واحدة فقط)"""
+    if not trace_logger.handlers:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        trace_logger.addHandler(handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+if os.environ.get('TRANSCRIPT_TRACE_LOG') == '1':
+    enable_trace_log()
+
+# دالة النسبة المئوية بأقرب رتبة
+def quantile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+# سجل المقاييس المشترك بين كل الجلسات
+class MetricsRegistry:
+    """أزمنة المراحل والطلبات في نافذة متحركة (لـ p50/p95) مع مجاميع وعدادات تراكمية"""
+    
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.totals = {}
+        self.peaks = {}
+        self.counters = Counter()
+    
+    def observe(self, kind, name, seconds, peak_bytes=None):
+        """kind: 'stage' لمرحلة واحدة أو 'request' لطلب كامل"""
+        key = (kind, name)
+        with self.lock:
+            self.samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            total = self.totals.setdefault(key, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            if peak_bytes is not None:
+                self.peaks[key] = max(self.peaks.get(key, 0), peak_bytes)
+    
+    def increment(self, metric, value=1, **labels):
+        with self.lock:
+            self.counters[(metric, tuple(sorted(labels.items())))] += value
+    
+    def snapshot(self):
+        """{'stage': {الاسم: {'count','sum','p50','p95','peak_bytes'}}, 'request': {...}, 'counters': [...]}"""
+        with self.lock:
+            samples = {key: sorted(values) for key, values in self.samples.items()}
+            totals = {key: tuple(total) for key, total in self.totals.items()}
+            peaks = dict(self.peaks)
+            counters = dict(self.counters)
+        
+        snapshot = {'stage': {}, 'request': {}, 'counters': []}
+        for (kind, name), values in sorted(samples.items()):
+            entry = {'count': totals[(kind, name)][0], 'sum': round(totals[(kind, name)][1], 6)}
+            for q in METRICS_QUANTILES:
+                entry[f"p{int(q * 100)}"] = quantile(values, q)
+            entry['peak_bytes'] = peaks.get((kind, name))
+            snapshot[kind][name] = entry
+        for (metric, labels), value in sorted(counters.items()):
+            snapshot['counters'].append({'metric': metric, 'labels': dict(labels), 'value': value})
+        return snapshot
+    
+    def prometheus_text(self):
+        """المقاييس بصيغة Prometheus النصية (summary للأزمنة، gauge للذاكرة، counter للعدادات)"""
+        snapshot = self.snapshot()
+        lines = []
+        
+        def labels_text(labels):
+            return ','.join(
+                '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                for key, value in labels.items()
+            )
+        
+        for kind, label in (('stage', 'stage'), ('request', 'name')):
+            metric = f"transcript_{kind}_seconds"
+            lines.append(f"# HELP {metric} Duration of each pipeline {kind} (quantiles over the last {self.window} samples)")
+            lines.append(f"# TYPE {metric} summary")
+            for name, entry in snapshot[kind].items():
+                for q in METRICS_QUANTILES:
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {entry[f"p{int(q * 100)}"]:.6f}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {entry["sum"]:.6f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {entry["count"]}')
+        
+        peaks = [(name, entry['peak_bytes']) for name, entry in snapshot['stage'].items() if entry['peak_bytes'] is not None]
+        if peaks:
+            lines.append("# HELP transcript_stage_peak_bytes Highest tracemalloc peak observed for each stage")
+            lines.append("# TYPE transcript_stage_peak_bytes gauge")
+            lines.extend(f'transcript_stage_peak_bytes{{stage="{name}"}} {peak}' for name, peak in peaks)
+        
+        declared = set()
+        for counter in snapshot['counters']:
+            if counter['metric'] not in declared:
+                declared.add(counter['metric'])
+                lines.append(f"# TYPE {counter['metric']} counter")
+            labels = labels_text(counter['labels'])
+            lines.append(f"{counter['metric']}{{{labels}}} {counter['value']}" if labels else f"{counter['metric']} {counter['value']}")
+        
+        return '\n'.join(lines) + '\n'
+
+# دالة الحصول على سجل المقاييس المشترك
+@lru_cache(maxsize=None)
+def get_metrics():
+    return MetricsRegistry()
+
+# دالة كتابة المقاييس إلى ملف نصي
+def write_metrics_file(path=METRICS_FILE):
+    """كتابة ذرية حتى لا يقرأ المجمع ملفاً نصف مكتوب"""
+    try:
+        write_chunks([get_metrics().prometheus_text()], path)
+    except Exception:
+        logger.exception("metrics file write failed")
+
+# تتبع طلب واحد
+class RequestTrace:
+    """مراحل طلب واحد بترتيب تنفيذها مع سماتها (البايتات، عدد المقاطع، الذاكرة...)"""
+    
+    def __init__(self, name, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs = attrs
+        self.spans = []
+        self.status = 'ok'
+        self.started = time.time()
+        self.clock = time.perf_counter()
+        self.seconds = None
+    
+    def finish(self):
+        self.seconds = round(time.perf_counter() - self.clock, 6)
+        metrics = get_metrics()
+        metrics.observe('request', self.name, self.seconds)
+        metrics.increment('transcript_requests_total', name=self.name, status=self.status)
+        trace_logger.info(json.dumps(self.to_dict(), ensure_ascii=False, default=str))
+        if METRICS_FILE:
+            write_metrics_file(METRICS_FILE)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'started': round(self.started, 3),
+            'seconds': self.seconds,
+            'attrs': self.attrs,
+            'spans': self.spans
+        }
+
+# دالة بدء تتبع طلب
+@contextmanager
+def trace_request(name, **attrs):
+    """كل stage() داخل الكتلة تُسجل في هذا الطلب؛ عند الخروج يُرصد زمنه الكلي ويُكتب سطر السجل.
+    يمكن تغيير trace.status ('empty' مثلاً) قبل الخروج؛ الاستثناء يجعلها 'error'"""
+    trace = RequestTrace(name, **attrs)
+    token = CURRENT_TRACE.set(trace)
+    try:
+        yield trace
+    except Exception:
+        trace.status = 'error'
+        raise
+    finally:
+        CURRENT_TRACE.reset(token)
+        trace.finish()
+
+# دالة قياس مرحلة واحدة
+@contextmanager
+def stage(name, **attrs):
+    """قياس زمن المرحلة (وذروة الذاكرة مع METRICS_TRACE_MEMORY) في المقاييس المشتركة والطلب الجاري؛
+    القاموس المُرجع يقبل سمات إضافية أثناء التنفيذ: bytes وsegments تُضاف للعدادات أيضاً"""
+    span = {'stage': name, **attrs}
+    parent = CURRENT_STAGE.get()
+    if parent:
+        span['parent'] = parent['span']['stage']
+    frame = {'span': span, 'baseline': 0, 'peak': 0, 'parent': parent}
+    memory = METRICS_TRACE_MEMORY
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # الذروة عامة للعملية: تُحفظ ذروة الأب قبل تصفيرها، والمراحل المتزامنة في جلسات أخرى قد تضخمها
+        if parent:
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame['baseline'] = tracemalloc.get_traced_memory()[0]
+    token = CURRENT_STAGE.set(frame)
+    started = time.perf_counter()
+    
+    try:
+        yield span
+    except Exception as e:
+        span['error'] = type(e).__name__
+        raise
+    finally:
+        CURRENT_STAGE.reset(token)
+        span['seconds'] = round(time.perf_counter() - started, 6)
+        if memory:
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            span['peak_bytes'] = max(0, peak - frame['baseline'])
+            if parent:
+                parent['peak'] = max(parent['peak'], peak)
+        
+        metrics = get_metrics()
+        metrics.observe('stage', name, span['seconds'], span.get('peak_bytes'))
+        if span.get('bytes'):
+            metrics.increment('transcript_downloaded_bytes_total', span['bytes'], stage=name)
+        if span.get('segments'):
+            metrics.increment('transcript_segments_total', span['segments'], stage=name)
+        if 'error' in span:
+            metrics.increment('transcript_stage_errors_total', stage=name)
+        
+        trace = CURRENT_TRACE.get()
+        if trace is not None:
+            trace.spans.append(span)
+
+# دالة عدد البايتات المستلمة لاستجابة HTTP
+def response_size(response):
+    """البايتات المقروءة من الشبكة (قبل فك الضغط) إن أمكن، وإلا حجم المحتوى"""
+    try:
+        return response.raw.tell()
+    except Exception:
+        try:
+            return len(response.content)
+        except Exception:
+            return None
+
+# إعدادات طبقة HTTP المشتركة لكل الطلبات الصادرة (ملفات النصوص والترجمة)
+HTTP_POOL_HOSTS = 8
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = (5, 30)
+HTTP_FETCH_WORKERS = 4
+HTTP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# دالة الحصول على جلسة HTTP المشتركة
+@lru_cache(maxsize=None)
+def get_http_session():
+    """جلسة requests واحدة لكل العملية: مجمع اتصالات لكل مضيف يبقيها مفتوحة (keep-alive) مع ضغط gzip"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    session.headers.update({'User-Agent': HTTP_USER_AGENT, 'Accept-Encoding': 'gzip, deflate'})
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# دالة طلب GET عبر الجلسة المشتركة
+def http_get(url, timeout=HTTP_TIMEOUT, **kwargs):
+    """GET بمهلة اتصال وقراءة إلزامية حتى لا يعلق أي خيط على مضيف بطيء"""
+    return get_http_session().get(url, timeout=timeout, **kwargs)
+
+# دالة استخراج معرف الفيديو من الرابط
+def extract_video_id(youtube_url):
+    """استخراج معرف الفيديو من رابط اليوتيوب"""
+    patterns = [
+        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\n?#]+)',
+        r'youtube\.com\/watch\?.*v=([^&\n?#]+)'
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, youtube_url)
+        if match:
+            return match.group(1)
+    return None
+
+# إعدادات محرك الترجمة
+TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+TRANSLATE_CHUNK_SIZE = 4000
+TRANSLATE_MAX_WORKERS = 4
+TRANSLATE_MAX_RETRIES = 3
+TRANSLATE_BACKOFF_SECONDS = 0.5
+TRANSLATE_TIMEOUT = (5, 10)
+
+# دالة تقسيم النص إلى جمل لا تتجاوز حد الطلب
+def split_text_into_units(text, max_chars=TRANSLATE_CHUNK_SIZE):
+    """تقسيم النص عند نهايات الجمل، مع تقسيم الجمل الأطول من max_chars عند الكلمات"""
+    units = []
+    
+    for sentence in re.split(r'(?<=[.!?؟])\s+', text.strip()):
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            units.append(sentence)
+            continue
+        
+        # جملة أطول من الحد: قسمها عند المسافات
+        piece = ""
+        for word in sentence.split():
+            while len(word) > max_chars:
+                if piece:
+                    units.append(piece)
+                    piece = ""
+                units.append(word[:max_chars])
+                word = word[max_chars:]
+            if piece and len(piece) + 1 + len(word) > max_chars:
+                units.append(piece)
+                piece = word
+            else:
+                piece = f"{piece} {word}" if piece else word
+        if piece:
+            units.append(piece)
+    
+    return units
+
+# دالة ترجمة جزء واحد مع إعادة المحاولة
+def translate_chunk(session, chunk, target_lang, source_lang='auto'):
+    """ترجمة جزء واحد مع إعادة المحاولة بتأخير متزايد، ويرفع استثناء عند الفشل النهائي"""
+    params = {
+        'client': 'gtx',
+        'sl': source_lang,
+        'tl': target_lang,
+        'dt': 't',
+        'q': chunk
+    }
+    
+    last_error = None
+    for attempt in range(TRANSLATE_MAX_RETRIES):
+        if attempt:
+            time.sleep(TRANSLATE_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+        try:
+            response = session.get(TRANSLATE_URL, params=params, timeout=TRANSLATE_TIMEOUT)
+            if response.status_code == 200:
+                result = response.json()
+                return ''.join([item[0] for item in result[0] if item[0]])
+            last_error = f"HTTP {response.status_code}"
+            # أخطاء الطلب نفسه لا تفيد إعادة المحاولة
+            if response.status_code < 500 and response.status_code != 429:
+                break
+        except Exception as e:
+            last_error = str(e)
+    
+    raise RuntimeError(last_error)
+
+# فاصل المقاطع داخل طلب الترجمة الواحد (يحافظ عليه المترجم كما هو)
+SEGMENT_DELIMITER = "\n"
+
+# دالة تجميع المقاطع في دفعات بحسب حد حجم الطلب
+def pack_segments(texts, max_chars=TRANSLATE_CHUNK_SIZE):
+    """إرجاع نطاقات (بداية، نهاية) لدفعات مقاطع لا يتجاوز نصها المجمع max_chars"""
+    batches = []
+    batch_start = 0
+    batch_size = 0
+    
+    for index, text in enumerate(texts):
+        added = len(text) + (len(SEGMENT_DELIMITER) if index > batch_start else 0)
+        if index > batch_start and batch_size + added > max_chars:
+            batches.append((batch_start, index))
+            batch_start = index
+            added = len(text)
+            batch_size = 0
+        batch_size += added
+    
+    if batch_start < len(texts):
+        batches.append((batch_start, len(texts)))
+    return batches
+
+# دالة ترجمة دفعة مقاطع مع الحفاظ على حدودها
+def translate_segment_batch(session, texts, target_lang, source_lang='auto'):
+    """ترجمة عدة مقاطع في طلب واحد، وتقسيم الدفعة إلى نصفين إذا لم تعد بنفس عدد المقاطع"""
+    translated = translate_chunk(session, SEGMENT_DELIMITER.join(texts), target_lang, source_lang)
+    parts = [part.strip() for part in translated.strip().split(SEGMENT_DELIMITER)]
+    
+    if len(parts) == len(texts):
+        return parts
+    if len(texts) == 1:
+        return [' '.join(parts)]
+    
+    middle = len(texts) // 2
+    return (translate_segment_batch(session, texts[:middle], target_lang, source_lang) +
+            translate_segment_batch(session, texts[middle:], target_lang, source_lang))
+
+# دالة ترجمة قائمة نصوص مع الذاكرة المؤقتة للترجمة
+def translate_texts(texts, target_langs, source_lang='auto', max_workers=TRANSLATE_MAX_WORKERS):
+    """ترجمة قائمة نصوص إلى عدة لغات، وإرسال ما لا يوجد في الذاكرة المؤقتة فقط"""
+    cache = get_translation_cache()
+    texts = [normalize_translation_text(text) for text in texts]
+    keys = [translation_cache_key(text) for text in texts]
+    session = get_http_session()
+    
+    # مواضع كل نص في القائمة الأصلية، لأن الدفعات تُبنى على النصوص بعد إزالة التكرار
+    positions = {}
+    for index, key in enumerate(keys):
+        positions.setdefault(key, []).append(index)
+    
+    jobs = {}
+    for lang in target_langs:
+        known = cache.get_many(set(keys), source_lang, lang)
+        
+        # النصوص المكررة داخل المهمة نفسها تُترجم مرة واحدة
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in known and text:
+                pending.setdefault(key, text)
+        
+        jobs[lang] = {
+            'known': known,
+            'cached': sum(1 for key in keys if key in known),
+            'pending_keys': list(pending),
+            'pending_texts': list(pending.values()),
+            'failed': []
+        }
+        jobs[lang]['batches'] = pack_segments(jobs[lang]['pending_texts'])
+    
+    total_batches = sum(len(job['batches']) for job in jobs.values())
+    if total_batches:
+        # جميع الدفعات لجميع اللغات في مجمع عمال واحد
+        with stage('translate', langs=len(jobs), batches=total_batches) as span, \
+                ThreadPoolExecutor(max_workers=min(max_workers, total_batches)) as executor:
+            futures = {
+                executor.submit(
+                    translate_segment_batch, session, job['pending_texts'][start:end], lang, source_lang
+                ): (lang, start, end)
+                for lang, job in jobs.items()
+                for start, end in job['batches']
+            }
+            for future in as_completed(futures):
+                lang, start, end = futures[future]
+                job = jobs[lang]
+                try:
+                    translated = dict(zip(job['pending_keys'][start:end], future.result()))
+                    job['known'].update(translated)
+                    cache.set_many(translated, source_lang, lang)
+                except Exception as e:
+                    # احتفظ بالنص الأصلي للمقاطع الفاشلة وسجل السبب ومواضعها في texts
+                    indexes = sorted(index for key in job['pending_keys'][start:end] for index in positions[key])
+                    job['failed'].append({
+                        'start': indexes[0], 'end': indexes[-1] + 1, 'indexes': indexes, 'error': str(e)
+                    })
+            span['failed'] = sum(len(job['failed']) for job in jobs.values())
+    
+    results = {}
+    for lang, job in jobs.items():
+        results[lang] = {
+            'texts': [job['known'].get(key, text) for key, text in zip(keys, texts)],
+            'batches': len(job['batches']),
+            'cached': job['cached'],
+            'failed': sorted(job['failed'], key=lambda item: item['start'])
+        }
+    return results
+
+# دالة ترجمة النص مع تقرير الأجزاء الفاشلة
+def translate_text_detailed(text, target_lang='ar', max_workers=TRANSLATE_MAX_WORKERS):
+    """ترجمة النص جملةً جملة بالتوازي وإرجاع النص المترجم مع قائمة الدفعات التي فشلت"""
+    units = split_text_into_units(text)
+    if not units:
+        return {'text': '', 'chunks': 0, 'failed': []}
+    
+    result = translate_texts(units, [target_lang], max_workers=max_workers)[target_lang]
+    return {'text': ' '.join(result['texts']), 'chunks': result['batches'], 'failed': result['failed']}
+
+# دالة ترجمة النص (مجانية)
+def translate_text_free(text, target_lang='ar'):
+    """ترجمة النص باستخدام خدمة مجانية"""
+    try:
+        return translate_text_detailed(text, target_lang)['text']
+    except Exception as e:
+        return text  # إرجاع النص الأصلي في حالة الخطأ
+
+# دالة ترجمة المقاطع مع الطوابع الزمنية إلى عدة لغات
+def translate_segments(transcript_data, target_langs, max_workers=TRANSLATE_MAX_WORKERS):
+    """ترجمة مقاطع النص إلى لغة أو أكثر مع الاحتفاظ بوقت بداية كل مقطع"""
+    if isinstance(target_langs, str):
+        target_langs = [target_langs]
+    
+    transcript = Transcript.from_segments(transcript_data)
+    results = translate_texts(
+        [transcript.text_at(i) for i in range(len(transcript))], target_langs, max_workers=max_workers
+    )
+    
+    translations = {}
+    for lang, result in results.items():
+        translations[lang] = {
+            'segments': transcript.with_texts(result['texts']),
+            'batches': result['batches'],
+            'failed': result['failed']
+        }
+    return translations
+
+# نمط المسح الواحد للنص: كلمة، أو نهاية جملة، أو فاصل فقرة
+TEXT_SCAN_PATTERN = re.compile(r'(?P<word>\w+)|(?P<end>[.!?]+)|(?P<para>\n\n)')
+
+# الكلمات الشائعة المستبعدة من تقييم الجمل
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'})
+
+# نتيجة تقطيع النص المشتركة بين التحليل والتلخيص والتنسيق
+class TextTokens:
+    """الكلمات (بأحرف صغيرة) وحدود الجمل وعدد الفقرات وتكرار الكلمات من مرور واحد على النص
+    
+    كل جملة ممثلة بـ (بداية الحرف، نهاية الحرف، أول كلمة، نهاية الكلمات) حتى لا
+    تُنسخ نصوص الجمل إلا عند الحاجة إليها.
+    """
+    
+    __slots__ = ('text', 'tokens', 'sentences', 'paragraphs', 'frequencies')
+    
+    def __init__(self, text):
+        self.text = text
+        tokens = []
+        sentences = []
+        paragraphs = 0
+        paragraph_has_words = False
+        sentence_start = 0
+        first_token = 0
+        
+        for match in TEXT_SCAN_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'word':
+                tokens.append(match.group().lower())
+                paragraph_has_words = True
+            elif kind == 'end':
+                if text[sentence_start:match.start()].strip():
+                    sentences.append((sentence_start, match.start(), first_token, len(tokens)))
+                sentence_start = match.end()
+                first_token = len(tokens)
+            elif paragraph_has_words:
+                paragraphs += 1
+                paragraph_has_words = False
+        
+        if text[sentence_start:].strip():
+            sentences.append((sentence_start, len(text), first_token, len(tokens)))
+        if paragraph_has_words:
+            paragraphs += 1
+        
+        self.tokens = tokens
+        self.sentences = sentences
+        self.paragraphs = paragraphs
+        self.frequencies = Counter(tokens)
+    
+    def sentence_text(self, index):
+        """نص الجملة رقم index بعد إزالة المسافات الطرفية"""
+        start, end, _, _ = self.sentences[index]
+        return self.text[start:end].strip()
+
+# دالة تقطيع النص مرة واحدة لكل محتوى
+@lru_cache(maxsize=16)
+def tokenize_text(text):
+    """تقطيع النص مرة واحدة؛ النتيجة مشتركة (للقراءة فقط) بين جميع الجلسات والدوال"""
+    return TextTokens(text)
+
+# دالة ترتيب جمل النص مرة واحدة لكل نص
+@lru_cache(maxsize=CACHE_MAX_ENTRIES)
+def rank_sentences(text):
+    """ترتيب فهارس الجمل تنازلياً حسب أهميتها (TF-IDF على مصفوفة جمل × كلمات متناثرة)
+    
+    يُحسب الترتيب مرة واحدة لكل نص، وأي طول للتلخيص هو مجرد شريحة منه.
+    """
+    import numpy as np
+    
+    tokens = tokenize_text(text)
+    sentence_count = len(tokens.sentences)
+    if not sentence_count:
+        return ()
+    
+    # ترقيم المفردات وتمثيل كل كلمة بموقع (جملة، مفردة) في المصفوفة المتناثرة
+    vocabulary = {word: index for index, word in enumerate(tokens.frequencies)}
+    term_ids = np.fromiter(map(vocabulary.__getitem__, tokens.tokens), dtype=np.int64, count=len(tokens.tokens))
+    lengths = np.fromiter((last - first for _, _, first, last in tokens.sentences), dtype=np.int64, count=sentence_count)
+    sentence_ids = np.repeat(np.arange(sentence_count, dtype=np.int64), lengths)
+    
+    # استبعاد الكلمات الشائعة
+    informative = np.fromiter((word not in STOP_WORDS for word in vocabulary), dtype=bool, count=len(vocabulary))
+    keep = informative[term_ids]
+    term_ids = term_ids[keep]
+    sentence_ids = sentence_ids[keep]
+    
+    # وزن المفردة = log(1 + تكرارها في النص) × IDF على مستوى الجمل
+    frequencies = np.fromiter(tokens.frequencies.values(), dtype=np.float64, count=len(vocabulary))
+    cells = np.unique(sentence_ids * len(vocabulary) + term_ids)
+    document_frequency = np.bincount(cells % len(vocabulary), minlength=len(vocabulary))
+    idf = np.log((1 + sentence_count) / (1 + document_frequency)) + 1.0
+    weights = np.log1p(frequencies) * idf
+    
+    # نقاط الجملة = مجموع أوزان كلماتها مطبّعاً بطولها حتى لا تطغى الجمل الطويلة
+    scores = np.bincount(sentence_ids, weights=weights[term_ids], minlength=sentence_count)
+    scores /= np.sqrt(np.maximum(lengths, 1))
+    
+    return tuple(np.argsort(-scores, kind='stable').tolist())
+
+# دالة تلخيص النص (مجانية)
+def summarize_text_free(text, num_sentences=5):
+    """تلخيص النص باستخدام خوارزمية بسيطة ومجانية"""
+    try:
+        with stage('summarize'):
+            # تقسيم النص إلى جمل وكلمات (مشترك مع analyze_text)
+            tokens = tokenize_text(text)
+            
+            if len(tokens.sentences) <= num_sentences:
+                return text
+            
+            # اختيار أفضل الجمل من الترتيب المحفوظ
+            top_indexes = rank_sentences(text)[:num_sentences]
+        
+        # ترتيب الجمل حسب ظهورها في النص الأصلي
+        summary_sentences = [tokens.sentence_text(index) for index in sorted(top_indexes)]
+        
+        return '. '.join(summary_sentences) + '.'
+        
+    except Exception as e:
+        return text[:500] + "..."  # تلخيص بسيط
+
+# دالة تحليل النص
+def analyze_text(text):
+    """تحليل شامل للنص"""
+    try:
+        # إحصائيات أساسية من تقطيع واحد مشترك
+        tokens = tokenize_text(text)
+        total_words = len(tokens.tokens)
+        
+        # تحليل الكلمات
+        top_words = heapq.nlargest(
+            10,
+            ((word, count) for word, count in tokens.frequencies.items() if len(word) > 3),
+            key=lambda item: item[1]
+        )
+        
+        # تقدير وقت القراءة (200 كلمة في الدقيقة)
+        reading_time = total_words / 200
+        
+        # تحليل طول الجمل
+        sentence_lengths = [last - first for _, _, first, last in tokens.sentences]
+        avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths) if sentence_lengths else 0
+        
+        return {
+            'total_words': total_words,
+            'total_sentences': len(tokens.sentences),
+            'total_paragraphs': tokens.paragraphs,
+            'reading_time_minutes': round(reading_time, 1),
+            'avg_sentence_length': round(avg_sentence_length, 1),
+            'top_words': top_words,
+            'unique_words': len(tokens.frequencies)
+        }
+    except:
+        return None
+
+# عدد نتائج البحث في الصفحة الواحدة
+SEARCH_PAGE_SIZE = 20
+
+# نمط الكلمات المستخدم في فهرسة النص والبحث؛ علامات التشكيل (Mn) جزء من الكلمة وليست فاصلاً
+TOKEN_PATTERN = re.compile(r'[\w\u0300-\u036f\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06dc\u06df-\u06ed]+')
+
+# دالة حذف علامات التشكيل
+def strip_marks(text):
+    """حذف العلامات غير المتباعدة (الحركات والشدة والتنوين...) بعد NFC، فتبقى الحروف المركبة مثل أ وé"""
+    return ''.join(ch for ch in unicodedata.normalize('NFC', text) if unicodedata.category(ch) != 'Mn')
+
+# دالة توحيد كلمة للفهرسة والبحث
+@lru_cache(maxsize=100000)
+def search_token(token):
+    """الكلمة بأحرف صغيرة ودون تشكيل، فـ'كَتَبَ' و'كتب' كلمة واحدة في الفهرس والاستعلام"""
+    token = token.lower()
+    return token if token.isascii() else strip_marks(token)
+
+# مكافأة المقطع الذي يحتوي العبارة متتالية مقارنة بالكلمات المتفرقة
+PHRASE_BONUS = 2.0
+
+# فهرس معكوس لنص واحد يُبنى مرة واحدة عند الاستخراج
+class TranscriptIndex:
+    """فهرس معكوس: كل كلمة ← مواضعها في تسلسل كلمات النص، وكل موضع ← رقم مقطعه
+    
+    المواضع متصلة عبر حدود المقاطع، لذا تُطابق العبارة الممتدة على مقطعين.
+    """
+    
+    __slots__ = ('transcript', 'postings', 'vocabulary', 'token_segments')
+    
+    def __init__(self, transcript):
+        self.transcript = Transcript.from_segments(transcript)
+        self.postings = {}
+        self.token_segments = array('q')
+        
+        position = 0
+        for index in range(len(self.transcript)):
+            for match in TOKEN_PATTERN.finditer(self.transcript.text_at(index)):
+                token = search_token(match.group())
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = array('q')
+                postings.append(position)
+                self.token_segments.append(index)
+                position += 1
+        
+        # قائمة مرتبة للبحث بالبادئة أثناء الكتابة
+        self.vocabulary = sorted(self.postings)
+    
+    def _expand_prefix(self, prefix):
+        """جميع كلمات الفهرس التي تبدأ بالبادئة"""
+        tokens = []
+        for i in range(bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            if not self.vocabulary[i].startswith(prefix):
+                break
+            tokens.append(self.vocabulary[i])
+        return tokens
+    
+    def _positions(self, tokens):
+        positions = set()
+        for token in tokens:
+            positions.update(self.postings.get(token, ()))
+        return positions
+    
+    def search(self, query, page=0, page_size=SEARCH_PAGE_SIZE):
+        """البحث عن كلمة أو عبارة وإرجاع صفحة من النتائج المرتبة مع العدد الكلي
+        
+        العبارة بين علامتي تنصيص تُطابق حرفياً ومتتالية فقط؛ وإلا تُقبل المقاطع التي
+        تحتوي جميع الكلمات، وتُعامل الكلمة الأخيرة كبادئة ما لم ينتهِ الاستعلام بمسافة.
+        """
+        stripped = query.strip()
+        exact = len(stripped) > 1 and stripped.startswith('"') and stripped.endswith('"')
+        terms = [term for term in map(search_token, TOKEN_PATTERN.findall(query)) if term]
+        empty = {'total': 0, 'page': 0, 'pages': 0, 'results': []}
+        if not terms:
+            return empty
+        
+        alternatives = [[term] for term in terms]
+        if not exact and not query.endswith(' '):
+            alternatives[-1] = self._expand_prefix(terms[-1])
+        positions = [self._positions(tokens) for tokens in alternatives]
+        if not all(positions):
+            return empty
+        
+        # تكرار كل كلمة في كل مقطع
+        segment_of = self.token_segments.__getitem__
+        term_frequencies = [Counter(map(segment_of, term_positions)) for term_positions in positions]
+        
+        # المطابقات المتتالية (قد تمتد عبر حدود المقاطع)، بدءاً من أندر كلمة
+        hits = {}
+        length = len(terms)
+        anchor = min(range(length), key=lambda i: len(positions[i]))
+        for anchor_position in positions[anchor]:
+            p = anchor_position - anchor
+            if all(p + i in positions[i] for i in range(length) if i != anchor):
+                start_segment = self.token_segments[p]
+                end_segment = self.token_segments[p + length - 1]
+                hit = hits.setdefault(start_segment, {'end': start_segment, 'phrases': 0})
+                hit['end'] = max(hit['end'], end_segment)
+                hit['phrases'] += 1
+        
+        # المقاطع التي تحتوي جميع الكلمات ولو متفرقة
+        if not exact and length > 1:
+            common = set(term_frequencies[0]).intersection(*term_frequencies[1:])
+            for segment in common:
+                hits.setdefault(segment, {'end': segment, 'phrases': 0})
+        
+        # الترتيب: TF-IDF للكلمات مع مكافأة للعبارة المتتالية
+        total_segments = len(self.transcript)
+        idf = [math.log(1 + total_segments / len(frequencies)) for frequencies in term_frequencies]
+        for segment, hit in hits.items():
+            score = sum(frequencies[segment] * weight for frequencies, weight in zip(term_frequencies, idf))
+            hit['score'] = score + PHRASE_BONUS * hit['phrases'] * sum(idf)
+        
+        pages = (len(hits) + page_size - 1) // page_size
+        page = max(0, min(page, pages - 1))
+        
+        # ترتيب ما يلزم حتى نهاية الصفحة المطلوبة فقط
+        ranked = heapq.nsmallest((page + 1) * page_size, hits.items(),
+                                 key=lambda item: (-item[1]['score'], item[0]))
+        
+        # تمييز كلمات النص التي تطابق الاستعلام بعد التوحيد (مع توسعات البادئة)، بتشكيلها الأصلي
+        matched = set(terms[:-1]).union(alternatives[-1])
+        
+        def highlight(match):
+            word = match.group()
+            return f"**{word}**" if search_token(word) in matched else word
+        
+        results = []
+        for segment, hit in ranked[page * page_size:(page + 1) * page_size]:
+            text = ' '.join(self.transcript.text_at(i) for i in range(segment, hit['end'] + 1))
+            start_time = self.transcript.start_at(segment)
+            results.append({
+                'time': format_timestamp(start_time),
+                'text': TOKEN_PATTERN.sub(highlight, text),
+                'timestamp': start_time,
+                'segment': segment,
+                'score': round(hit['score'], 3)
+            })
+        
+        return {'total': len(hits), 'page': page, 'pages': pages, 'results': results}
+
+# دالة البحث في النص
+def search_in_text(text, query, transcript_data=None, page=0, page_size=SEARCH_PAGE_SIZE, index=None):
+    """البحث في النص مع إظهار المقاطع (يستخدم الفهرس المعكوس عند توفر المقاطع)"""
+    try:
+        if not query.strip():
+            return []
+        
+        if index is not None or transcript_data:
+            # البحث في المقاطع مع الأوقات
+            index = index or TranscriptIndex(transcript_data)
+            return index.search(query, page, page_size)['results']
+        
+        # البحث في النص العادي
+        query_lower = query.lower()
+        highlight = re.compile('(' + '|'.join(re.escape(word) for word in query.split()) + ')', re.IGNORECASE)
+        results = []
+        sentences = re.split(r'[.!?]+', text)
+        for sentence in sentences:
+            if query_lower in sentence.lower():
+                results.append({
+                    'time': 'غير محدد',
+                    'text': highlight.sub(r'**\1**', sentence),
+                    'timestamp': 0
+                })
+        
+        return results[page * page_size:(page + 1) * page_size]
+    except:
+        return []
+
+# دالة تصدير متقدم
+def create_advanced_export(transcript_data, full_text, video_info, analysis, language):
+    """إنشاء تصدير متقدم بتنسيق جميل (نسخة نصية من iter_markdown_report)"""
+    
+    try:
+        meta = {'video_info': video_info, 'analysis': analysis, 'language': language}
+        return ''.join(iter_markdown_report(transcript_data, meta))
+        
+    except Exception as e:
+        return f"خطأ في إنشاء التقرير: {str(e)}"
+
+# خيارات yt-dlp المشتركة لاستخراج البيانات والنصوص
+YDL_OPTS = {
+    'writesubtitles': True,
+    'writeautomaticsub': True,
+    'skip_download': True,
+    'subtitleslangs': ['ar', 'en', 'es', 'fr', 'de', 'it', 'pt', 'ru'],
+    'quiet': True,
+    'extract_flat': False,
+    'no_warnings': False,
+    'ignoreerrors': False,
+    'geo_bypass': True,
+    'user_agent': HTTP_USER_AGENT
+}
+
+# دالة استخراج بيانات الفيديو باستدعاء واحد
+def extract_video_data(youtube_url, on_progress=None):
+    """استخراج معلومات الفيديو وجداول النصوص من استدعاء extract_info واحد"""
+    
+    try:
+        import yt_dlp
+        
+        report(on_progress, 'info', "🔍 استخراج بيانات الفيديو باستخدام yt-dlp...")
+        
+        with stage('extract_info'), yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
+            info = ydl.extract_info(youtube_url, download=False)
+        
+        return video_data_from_info(info)
+        
+    except Exception as e:
+        report(on_progress, 'error', f"❌ خطأ في yt-dlp: {str(e)}")
+        return None
+
+# دالة بناء بيانات الفيديو من نتيجة extract_info
+def video_data_from_info(info):
+    """معلومات الفيديو وجداول النصوص ولغته الأصلية من بيانات yt-dlp"""
+    return {
+        'video_info': get_video_info(info),
+        'subtitles': info.get('subtitles') or {},
+        'automatic_captions': info.get('automatic_captions') or {},
+        'language': info.get('language')
+    }
+
+# دالة استخراج النصوص من بيانات yt-dlp
+def get_transcript_with_ytdlp(video_data, on_progress=None, preferred_langs=()):
+    """تقييم كل المسارات مرة واحدة وتحميل الأفضل فقط، مع الانتقال للتالي عند فشل التحميل"""
+    
+    try:
+        # فحص النصوص المتاحة
+        subtitles = video_data.get('subtitles', {})
+        automatic_captions = video_data.get('automatic_captions', {})
+        
+        report(on_progress, 'info', f"📊 نصوص يدوية: {len(subtitles)} لغة")
+        report(on_progress, 'info', f"📊 نصوص تلقائية: {len(automatic_captions)} لغة")
+        
+        # ترتيب المسارات حسب الأفضلية دون أي تحميل
+        for track in rank_subtitle_tracks(video_data, preferred_langs)[:SUBTITLE_MAX_ATTEMPTS]:
+            report(on_progress, 'success', f"✅ وجدت نص {track['type_desc']} باللغة: {track['lang']} ({track['ext']})")
+            transcript_data, language = download_and_parse_subtitle(
+                track['url'], track['lang'], track['type_desc'], auto_captions=track['auto_captions'],
+                ext=track['ext'], on_progress=on_progress
+            )
+            if transcript_data:
+                return transcript_data, language
+            report(on_progress, 'warning', f"فشل في استخراج النص {track['type_desc']} {track['lang']}، جاري تجربة المسار التالي")
+        
+        report(on_progress, 'error', "❌ لم يتم العثور على أي نصوص")
+        return None, None
+        
+    except Exception as e:
+        report(on_progress, 'error', f"❌ خطأ في استخراج النصوص: {str(e)}")
+        return None, None
+
+# تنسيقات النصوص مرتبة حسب الأفضلية: json3/srv3 تحمل أوقاتاً بالميلي ثانية دون تحليل نصي
+SUBTITLE_FORMAT_PREFERENCE = ('json3', 'srv3', 'vtt', 'srt', 'ttml')
+STRUCTURED_SUBTITLE_FORMATS = ('json3', 'srv3')
+
+# دالة اختيار أفضل تنسيق من قائمة تنسيقات لغة واحدة
+def pick_subtitle_format(formats):
+    """إرجاع التنسيق الأعلى أفضلية الذي له رابط، أو None"""
+    available = {f.get('ext'): f for f in formats if f.get('url')}
+    for ext in SUBTITLE_FORMAT_PREFERENCE:
+        if ext in available:
+            return available[ext]
+    return None
+
+# لغات احتياطية مرتبة بعد لغات المستخدم واللغة الأصلية للفيديو
+SUBTITLE_FALLBACK_LANGS = tuple(YDL_OPTS['subtitleslangs'])
+
+# عدد المسارات التي تُجرب عند فشل تحميل الأفضل
+SUBTITLE_MAX_ATTEMPTS = 3
+
+# دالة استخراج رمز اللغة الأساسي
+def base_language(lang):
+    """'en-US' و'en-orig' و'en_GB' كلها 'en'"""
+    return re.split(r'[-_]', (lang or '').lower(), 1)[0]
+
+# دالة تقييم مسارات النصوص
+def rank_subtitle_tracks(video_data, preferred_langs=()):
+    """كل المسارات القابلة للتحميل مرتبة من الأفضل، دون أي طلب شبكة
+    
+    مفتاح الترتيب: الترجمة الآلية أخيراً، ثم ترتيب اللغة (لغات المستخدم، ثم لغة الفيديو
+    الأصلية، ثم SUBTITLE_FALLBACK_LANGS)، ثم اليدوي قبل التلقائي، ثم جودة التنسيق.
+    """
+    preferred = [base_language(lang) for lang in preferred_langs]
+    original = base_language(video_data.get('language'))
+    
+    def language_rank(lang):
+        base = base_language(lang)
+        if base in preferred:
+            return preferred.index(base)
+        if original and base == original:
+            return len(preferred)
+        if base in SUBTITLE_FALLBACK_LANGS:
+            return len(preferred) + 1 + SUBTITLE_FALLBACK_LANGS.index(base)
+        return len(preferred) + 1 + len(SUBTITLE_FALLBACK_LANGS)
+    
+    tracks = []
+    for source, type_desc, auto_captions in (
+        (video_data.get('subtitles', {}), 'يدوي', False),
+        (video_data.get('automatic_captions', {}), 'تلقائي', True)
+    ):
+        for lang, formats in source.items():
+            subtitle = pick_subtitle_format(formats)
+            if not subtitle:
+                continue
+            
+            # مسارات التلقائي المترجمة آلياً تحمل tlang في الرابط، والأصلية قد تنتهي بـ -orig
+            translated = auto_captions and 'tlang=' in subtitle['url']
+            tracks.append({
+                'lang': lang,
+                'type_desc': type_desc,
+                'auto_captions': auto_captions,
+                'translated': translated,
+                'ext': subtitle['ext'],
+                'url': subtitle['url'],
+                'score': (
+                    translated,
+                    language_rank(lang),
+                    auto_captions,
+                    not lang.endswith('-orig'),
+                    SUBTITLE_FORMAT_PREFERENCE.index(subtitle['ext'])
+                )
+            })
+    
+    tracks.sort(key=lambda track: track['score'])
+    return tracks
+
+# دالة اختيار مسار النص دون واجهة (للمعالجة الدفعية)
+def select_subtitle_track(video_data, preferred_langs=()):
+    """أفضل مسار من rank_subtitle_tracks، أو None"""
+    tracks = rank_subtitle_tracks(video_data, preferred_langs)
+    return tracks[0] if tracks else None
+
+# دالة تحميل عدة لغات معاً
+def fetch_subtitle_languages(video_data, langs, max_workers=HTTP_FETCH_WORKERS):
+    """تحميل أفضل مسار لكل لغة مطلوبة بالتوازي؛ ترجع {اللغة: Transcript أو الاستثناء}"""
+    tracks = rank_subtitle_tracks(video_data)
+    chosen = {}
+    for lang in langs:
+        # الترجمة الآلية تأتي آخر الترتيب العام، فتُصفى المسارات باللغة أولاً
+        matching = [track for track in tracks if base_language(track['lang']) == base_language(lang)]
+        if matching:
+            chosen[lang] = matching[0]
+    
+    results = {lang: LookupError("لا يوجد مسار لهذه اللغة") for lang in langs if lang not in chosen}
+    if not chosen:
+        return results
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chosen)))) as executor:
+        futures = {
+            executor.submit(fetch_subtitle_transcript, track['url'], track['auto_captions'], track['ext']): lang
+            for lang, track in chosen.items()
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+    return results
+
+# مهلة الاتصال والقراءة لتحميل ملفات النصوص (بالثواني)
+SUBTITLE_TIMEOUT = HTTP_TIMEOUT
+
+# عدد المقاطع المعروضة كمعاينة أثناء التحميل، وتواتر تحديث التقدم
+PREVIEW_SEGMENTS = 60
+PROGRESS_EVERY = 200
+
+# دالة تحميل وتحليل ملف النص
+def download_and_parse_subtitle(subtitle_url, language, type_desc, auto_captions=False, ext='vtt', on_progress=None):
+    """تحميل ملف النص كتدفق وتحليله سطراً بسطر مع عرض أول المقاطع فور وصولها"""
+    
+    try:
+        report(on_progress, 'info', f"📥 تحميل ملف النص ({type_desc})...")
+        
+        # التنسيقات المنظمة تُحلل مباشرة من JSON/XML دون المرور بمحلل VTT
+        if ext in STRUCTURED_SUBTITLE_FORMATS:
+            with stage('subtitle_download', lang=language, ext=ext) as span:
+                response = http_get(subtitle_url, timeout=SUBTITLE_TIMEOUT)
+                response.raise_for_status()
+                span['bytes'] = response_size(response)
+            report(on_progress, 'success', f"✅ تم تحميل الملف: {len(response.content)} بايت")
+            
+            with stage('subtitle_parse', ext=ext) as span:
+                transcript_data = Transcript.from_segments(parse_structured_subtitle(response.content, ext))
+                span['segments'] = len(transcript_data)
+            if transcript_data:
+                report(on_progress, 'success', f"✅ تم تحليل {len(transcript_data)} مقطع")
+                return transcript_data, f"{language} ({type_desc})"
+            report(on_progress, 'warning', f"⚠️ ملف {ext} فارغ، جاري تجربة VTT...")
+            subtitle_url = re.sub(r'([?&]fmt=)[^&]+', r'\1vtt', subtitle_url)
+        
+        transcript_data = []
+        total_chars = 0
+        
+        def counted_lines(lines):
+            nonlocal total_chars
+            for line in lines:
+                total_chars += len(line) + 1
+                yield line
+        
+        # تحميل ملف النص كتدفق دون الاحتفاظ بالمحتوى كاملاً في الذاكرة (التحليل يجري أثناء التحميل
+        # فتُقاس المرحلتان معاً)
+        with stage('subtitle_download', lang=language, ext='vtt', streamed=True) as span, \
+                http_get(subtitle_url, stream=True, timeout=SUBTITLE_TIMEOUT) as response:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            
+            # تحليل ملف VTT/SRT أثناء وصوله
+            lines = counted_lines(response.iter_lines(decode_unicode=True))
+            for segment in iter_subtitle_segments(lines, auto_captions):
+                transcript_data.append(segment)
+                count = len(transcript_data)
+                
+                if count == PREVIEW_SEGMENTS:
+                    report(on_progress, 'preview', Transcript.from_segments(transcript_data).timed_text())
+                if count % PROGRESS_EVERY == 0:
+                    report(on_progress, 'status', f"📥 تم استلام {count} مقطع (حتى {format_timestamp(segment['start'])})")
+            
+            span['bytes'] = response_size(response)
+            span['segments'] = len(transcript_data)
+        
+        report(on_progress, 'clear', '')
+        report(on_progress, 'success', f"✅ تم تحميل الملف: {total_chars} حرف")
+        
+        if transcript_data:
+            report(on_progress, 'success', f"✅ تم تحليل {len(transcript_data)} مقطع")
+            return Transcript.from_segments(transcript_data), f"{language} ({type_desc})"
+        else:
+            report(on_progress, 'error', "❌ فشل في تحليل محتوى النص")
+            return None, None
+            
+    except Exception as e:
+        report(on_progress, 'error', f"❌ خطأ في تحميل النص: {str(e)}")
+        return None, None
+
+# دالة تحميل وتحليل ملف النص دون واجهة (آمنة للاستدعاء من خيوط العمل)
+def fetch_subtitle_transcript(subtitle_url, auto_captions=False, ext='vtt'):
+    """تحميل ملف النص وتحليله إلى Transcript دون أي رسائل تقدم؛ يرفع استثناء عند الفشل"""
+    if ext in STRUCTURED_SUBTITLE_FORMATS:
+        with stage('subtitle_download', ext=ext) as span:
+            response = http_get(subtitle_url, timeout=SUBTITLE_TIMEOUT)
+            response.raise_for_status()
+            span['bytes'] = response_size(response)
+        with stage('subtitle_parse', ext=ext) as span:
+            transcript_data = Transcript.from_segments(parse_structured_subtitle(response.content, ext))
+            span['segments'] = len(transcript_data)
+        if transcript_data:
+            return transcript_data
+        subtitle_url = re.sub(r'([?&]fmt=)[^&]+', r'\1vtt', subtitle_url)
+    
+    with stage('subtitle_download', ext='vtt', streamed=True) as span, \
+            http_get(subtitle_url, stream=True, timeout=SUBTITLE_TIMEOUT) as response:
+        response.raise_for_status()
+        if response.encoding is None:
+            response.encoding = 'utf-8'
+        lines = response.iter_lines(decode_unicode=True)
+        transcript_data = Transcript.from_segments(iter_subtitle_segments(lines, auto_captions))
+        span['bytes'] = response_size(response)
+        span['segments'] = len(transcript_data)
+        return transcript_data
+
+# دالة تحليل ملفات النصوص المنظمة
+def parse_structured_subtitle(content, ext):
+    """تحليل محتوى json3 أو srv3 وإرجاع قائمة مقاطع بأوقات دقيقة بالميلي ثانية"""
+    if ext == 'json3':
+        return list(iter_json3_segments(json_loads(content)))
+    return list(iter_srv3_segments(ET.fromstring(content)))
+
+# دالة تحليل أحداث json3
+def iter_json3_segments(data):
+    """توليد المقاطع من أحداث json3 (tStartMs و dDurationMs و segs مع tOffsetMs للكلمات)"""
+    for event in data.get('events', ()):
+        segs = event.get('segs')
+        if not segs or event.get('aAppend'):
+            continue
+        
+        text = ' '.join(''.join(seg.get('utf8', '') for seg in segs).split())
+        if not text:
+            continue
+        
+        start_ms = event.get('tStartMs', 0)
+        segment = {
+            'start': start_ms / 1000,
+            'end': (start_ms + event.get('dDurationMs', 0)) / 1000,
+            'text': text
+        }
+        
+        # أوقات الكلمات متوفرة عندما يُقسم الحدث إلى عدة أجزاء
+        if len(segs) > 1:
+            segment['words'] = [
+                ((start_ms + seg.get('tOffsetMs', 0)) / 1000, word)
+                for seg in segs
+                for word in seg.get('utf8', '').split()
+            ]
+        yield segment
+
+# دالة تحليل فقرات srv3
+def iter_srv3_segments(root):
+    """توليد المقاطع من عناصر <p t="" d=""> في srv3، مع أوقات الكلمات من عناصر <s t="">"""
+    for paragraph in root.iter('p'):
+        parts = list(paragraph.iter('s'))
+        text = ' '.join(''.join(paragraph.itertext()).split())
+        if not text:
+            continue
+        
+        start_ms = int(paragraph.get('t', 0))
+        segment = {
+            'start': start_ms / 1000,
+            'end': (start_ms + int(paragraph.get('d', 0))) / 1000,
+            'text': text
+        }
+        
+        if len(parts) > 1:
+            segment['words'] = [
+                ((start_ms + int(part.get('t', 0))) / 1000, word)
+                for part in parts
+                for word in (part.text or '').split()
+            ]
+        yield segment
+
+# علامات توقيت الكلمات داخل أسطر النصوص التلقائية مثل <00:00:01.520>
+WORD_TIMING_PATTERN = re.compile(r'<((?:\d+:)?\d{2}:\d{2}\.\d{3})>')
+
+# عدد الأسطر الأخيرة التي يُقارن بها السطر المتكرر في النصوص التلقائية
+ROLLING_CAPTION_WINDOW = 3
+
+# دالة استخراج أوقات الكلمات من سطر نص تلقائي
+def parse_word_timings(line, cue_start):
+    """إرجاع قائمة (وقت البداية، الكلمة)، وتأخذ الكلمات قبل أول علامة وقت بداية المقطع"""
+    words = []
+    word_start = cue_start
+    
+    # الأجزاء الفردية أوقات والزوجية نصوص
+    for index, part in enumerate(WORD_TIMING_PATTERN.split(line)):
+        if index % 2:
+            word_start = parse_time_to_seconds(part)
+        else:
+            words.extend((word_start, word) for word in clean_subtitle_text(part).split())
+    
+    return words
+
+# دالة تحليل أسطر ملف النص تدريجياً
+def iter_subtitle_segments(lines, auto_captions=False):
+    """توليد مقاطع ملف VTT أو SRT واحداً تلو الآخر من أي مصدر للأسطر
+    
+    في النصوص التلقائية يكرر يوتيوب كل سطر في مقطعين أو ثلاثة متتالية؛ مع
+    auto_captions=True تُحذف الأسطر المكررة في مرور واحد وتُحفظ أوقات الكلمات.
+    """
+    
+    current_start = 0
+    current_end = None
+    in_header = True
+    recent_lines = deque(maxlen=ROLLING_CAPTION_WINDOW)
+    
+    for line in lines:
+        line = line.strip()
+        
+        # تخطي الأسطر الفارغة ورؤوس VTT
+        if not line or line.startswith('WEBVTT') or line.startswith('NOTE'):
+            continue
+        
+        # فحص إذا كان السطر يحتوي على توقيت
+        if '-->' in line:
+            in_header = False
+            
+            # استخراج الوقت
+            time_parts = line.split('-->')
+            if len(time_parts) >= 2:
+                start_time_str = time_parts[0].strip()
+                end_time_str = time_parts[1].strip().split(' ')[0]
+                
+                # تحويل الوقت إلى ثواني
+                current_start = parse_time_to_seconds(start_time_str)
+                current_end = parse_time_to_seconds(end_time_str)
+                
+        elif not in_header and not line.isdigit():
+            # هذا نص (أسطر رأس VTT مثل Kind: و Language: تسبق أول توقيت)
+            # تنظيف النص من علامات HTML
+            clean_text = clean_subtitle_text(line)
+            if not clean_text:
+                continue
+            
+            segment = {
+                'start': current_start,
+                'end': current_end,
+                'text': clean_text
+            }
+            
+            if auto_captions:
+                # السطر الذي يحمل أوقات كلمات جديد دائماً، والسطر العادي المكرر تمرير لسطر سابق
+                words = parse_word_timings(line, current_start) if WORD_TIMING_PATTERN.search(line) else None
+                if not words and clean_text in recent_lines:
+                    continue
+                recent_lines.append(clean_text)
+                if words:
+                    segment['words'] = words
+            
+            yield segment
+
+# دالة تحليل محتوى النص
+def parse_subtitle_content(content, auto_captions=False):
+    """تحليل محتوى ملف النص VTT أو SRT"""
+    
+    try:
+        return list(iter_subtitle_segments(content.splitlines(), auto_captions))
+        
+    except Exception as e:
+        return []
+
+# دالة تحويل الوقت إلى ثواني
+def parse_time_to_seconds(time_str):
+    """تحويل سلسلة الوقت (HH:MM:SS.mmm أو MM:SS,mmm) إلى ثواني مع الاحتفاظ بالميلي ثانية"""
+    
+    try:
+        # SRT تستخدم الفاصلة قبل الميلي ثانية
+        time_str = time_str.replace(',', '.')
+        
+        # تقسيم الوقت
+        parts = time_str.split(':')
+        
+        if len(parts) == 3:
+            hours, minutes, seconds = parts
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        elif len(parts) == 2:
+            minutes, seconds = parts
+            return int(minutes) * 60 + float(seconds)
+        else:
+            return 0
+            
+    except:
+        return 0
+
+# دالة تنظيف النص
+def clean_subtitle_text(text):
+    """تنظيف النص من علامات HTML والتنسيق"""
+    
+    # إزالة علامات HTML
+    text = re.sub(r'<[^>]+>', '', text)
+    
+    # إزالة المسافات الزائدة
+    text = ' '.join(text.split())
+    
+    return text.strip()
+
+# دالة تنسيق الوقت للعرض
+def format_timestamp(start_time):
+    """تنسيق الثواني بصيغة MM:SS"""
+    start_min = int(start_time // 60)
+    start_sec = int(start_time % 60)
+    return f"{start_min:02d}:{start_sec:02d}"
+
+# بنية عمودية مضغوطة لمقاطع النص
+class Transcript:
+    """مقاطع النص مخزنة في أعمدة array('d') للأوقات ونص واحد مع فهارس بدايات المقاطع
+    
+    تتصرف كقائمة قاموس {'start', 'end', 'text'} عند الفهرسة أو التكرار، والتقطيع
+    يعيد عرضاً يشارك نفس الأعمدة دون نسخها. أوقات الكلمات (من النصوص التلقائية)
+    تُحفظ في عمود إضافي مرتب بنفس ترتيب كلمات النص.
+    """
+    
+    __slots__ = ('_starts', '_ends', '_text', '_offsets', '_word_starts', '_word_offsets', '_lo', '_hi')
+    
+    def __init__(self, starts=None, ends=None, text="", offsets=None,
+                 word_starts=None, word_offsets=None, lo=0, hi=None):
+        self._starts = starts if starts is not None else array('d')
+        self._ends = ends if ends is not None else array('d')
+        self._text = text
+        # offsets[i] بداية المقطع i في النص، وبين كل مقطعين مسافة واحدة
+        self._offsets = offsets if offsets is not None else array('q', [0])
+        # word_offsets[i] موضع أول كلمة للمقطع i في word_starts (صفر كلمات = لا توجد أوقات)
+        self._word_starts = word_starts if word_starts is not None else array('d')
+        self._word_offsets = word_offsets if word_offsets is not None else array('q', [0] * len(self._offsets))
+        self._lo = lo
+        self._hi = len(self._starts) if hi is None else hi
+    
+    @classmethod
+    def from_segments(cls, segments):
+        """بناء النص من أي مصدر لمقاطع {'start', 'text'} مع تجاهل المقاطع الفارغة"""
+        if isinstance(segments, cls):
+            return segments
+        
+        starts = array('d')
+        ends = array('d')
+        offsets = array('q', [0])
+        word_starts = array('d')
+        word_offsets = array('q', [0])
+        parts = []
+        position = 0
+        
+        for segment in segments:
+            words = segment['text'].split()
+            if not words:
+                continue
+            text = ' '.join(words)
+            end = segment.get('end')
+            starts.append(segment['start'])
+            ends.append(math.nan if end is None else end)
+            parts.append(text)
+            position += len(text) + 1
+            offsets.append(position)
+            
+            # أوقات الكلمات تُحفظ فقط إذا طابقت كلمات النص
+            timings = segment.get('words')
+            if timings and len(timings) == len(words):
+                word_starts.extend(word_start for word_start, _ in timings)
+            word_offsets.append(len(word_starts))
+        
+        return cls(starts, ends, ' '.join(parts), offsets, word_starts, word_offsets)
+    
+    def __len__(self):
+        return self._hi - self._lo
+    
+    def __bool__(self):
+        return self._hi > self._lo
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Transcript slices do not support a step")
+            return Transcript(self._starts, self._ends, self._text, self._offsets,
+                              self._word_starts, self._word_offsets,
+                              self._lo + lo, self._lo + max(lo, hi))
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Transcript index out of range")
+        return self._segment(self._lo + index)
+    
+    def __iter__(self):
+        for i in range(self._lo, self._hi):
+            yield self._segment(i)
+    
+    def __reduce__(self):
+        # تسلسل العرض الحالي فقط كبايتات (يستخدمه pickle وتجزئة st.cache_data)
+        lo, hi = self._lo, self._hi
+        text_base = self._offsets[lo]
+        word_base = self._word_offsets[lo]
+        offsets = array('q', (offset - text_base for offset in self._offsets[lo:hi + 1]))
+        word_offsets = array('q', (offset - word_base for offset in self._word_offsets[lo:hi + 1]))
+        word_starts = self._word_starts[word_base:self._word_offsets[hi]]
+        state = (self._starts[lo:hi].tobytes(), self._ends[lo:hi].tobytes(), self.full_text,
+                 offsets.tobytes(), word_starts.tobytes(), word_offsets.tobytes())
+        return (Transcript, (), state)
+    
+    def __setstate__(self, state):
+        starts, ends, text, offsets, word_starts, word_offsets = state
+        self.__init__(array('d'), array('d'), text, array('q'), array('d'), array('q'))
+        self._starts.frombytes(starts)
+        self._ends.frombytes(ends)
+        self._offsets.frombytes(offsets)
+        self._word_starts.frombytes(word_starts)
+        self._word_offsets.frombytes(word_offsets)
+        self._hi = len(self._starts)
+    
+    def digest(self):
+        """بصمة sha1 لمحتوى العرض الحالي (أوقات ونصوص)؛ مفتاح ملفات التصدير"""
+        digest = hashlib.sha1()
+        for part in self.__reduce__()[2]:
+            digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        return digest.hexdigest()
+    
+    def _segment(self, i):
+        end = self._ends[i]
+        segment = {
+            'start': self._starts[i],
+            'end': None if math.isnan(end) else end,
+            'text': self.text_at(i - self._lo)
+        }
+        words = self.word_timings(i - self._lo)
+        if words:
+            segment['words'] = words
+        return segment
+    
+    def text_at(self, index):
+        """نص المقطع رقم index دون بناء قاموس"""
+        i = self._lo + index
+        return self._text[self._offsets[i]:self._offsets[i + 1] - 1]
+    
+    def start_at(self, index):
+        """وقت بداية المقطع رقم index"""
+        return self._starts[self._lo + index]
+    
+    def index_at(self, seconds):
+        """رقم المقطع الجاري عند الثانية seconds (آخر مقطع يبدأ قبلها أو عندها) ببحث ثنائي"""
+        return max(0, bisect_right(self._starts, seconds, self._lo, self._hi) - 1 - self._lo)
+    
+    def word_timings(self, index):
+        """قائمة (وقت البداية، الكلمة) للمقطع رقم index، أو None إذا لم تتوفر أوقات الكلمات"""
+        i = self._lo + index
+        first, last = self._word_offsets[i], self._word_offsets[i + 1]
+        if first == last:
+            return None
+        return list(zip(self._word_starts[first:last], self.text_at(index).split()))
+    
+    @property
+    def full_text(self):
+        """النص الكامل بمسافة بين المقاطع"""
+        if self._lo == 0 and self._hi == len(self._starts):
+            return self._text
+        if self._hi <= self._lo:
+            return ""
+        return self._text[self._offsets[self._lo]:self._offsets[self._hi] - 1]
+    
+    def iter_timed_lines(self):
+        """توليد أسطر '[MM:SS] النص' واحداً تلو الآخر"""
+        for i in range(len(self)):
+            yield f"[{format_timestamp(self.start_at(i))}] {self.text_at(i)}\n\n"
+    
+    def timed_text(self):
+        """النص مع الطوابع الزمنية"""
+        return ''.join(self.iter_timed_lines())
+    
+    def word_count(self):
+        """عدد الكلمات في النص (من التقطيع المشترك مع analyze_text)"""
+        return len(tokenize_text(self.full_text).tokens)
+    
+    def with_texts(self, texts):
+        """نص جديد بنفس الأوقات ونصوص مختلفة (مثل الترجمة)"""
+        return Transcript.from_segments(
+            {'start': segment['start'], 'end': segment['end'], 'text': text}
+            for segment, text in zip(self, texts)
+        )
+    
+    def to_list(self):
+        """تحويل المقاطع إلى قائمة قواميس (للتخزين بصيغة JSON)"""
+        return list(self)
+
+# دالة تنسيق النصوص المستخرجة
+def format_transcript(transcript_list):
+    """تنسيق النصوص مع الطوابع الزمنية"""
+    transcript = Transcript.from_segments(transcript_list)
+    return transcript.full_text, transcript.timed_text(), transcript.word_count()
+
+# المدة الافتراضية لآخر مقطع عند غياب وقت النهاية
+DEFAULT_SEGMENT_DURATION = 3.0
+
+# دالة تنسيق الوقت لملفات الترجمة
+def format_subtitle_time(seconds, separator='.'):
+    """تنسيق الثواني بصيغة HH:MM:SS.mmm (أو بفاصلة لملفات SRT)"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+# دالة توليد أوقات البداية والنهاية للمقاطع
+def iter_segment_timings(transcript_data):
+    """توليد (بداية، نهاية، نص) لكل مقطع، مع اعتبار بداية المقطع التالي نهاية للحالي"""
+    previous = None
+    for segment in transcript_data:
+        if previous is not None:
+            start, end, text = previous
+            yield start, max(segment['start'], start) if end is None else end, text
+        previous = (segment['start'], segment.get('end'), segment['text'])
+    
+    if previous is not None:
+        start, end, text = previous
+        yield start, start + DEFAULT_SEGMENT_DURATION if end is None else end, text
+
+# دالة إنشاء ملف SRT
+def segments_to_srt(transcript_data):
+    """تحويل المقاطع إلى ملف ترجمة SRT"""
+    return ''.join(iter_srt(transcript_data))
+
+# دالة إنشاء ملف WebVTT
+def segments_to_vtt(transcript_data):
+    """تحويل المقاطع إلى ملف ترجمة WebVTT"""
+    return ''.join(iter_vtt(transcript_data))
+
+# دالة الحصول على معلومات الفيديو
+def get_video_info(info):
+    """استخلاص معلومات الفيديو من بيانات yt-dlp المستخرجة مسبقاً"""
+    try:
+        return {
+            'title': info.get('title', 'غير متوفر'),
+            'duration': info.get('duration', 0),
+            'uploader': info.get('uploader', 'غير متوفر'),
+            'view_count': info.get('view_count', 0),
+            'upload_date': info.get('upload_date', 'غير متوفر'),
+            'description': info.get('description', 'غير متوفر')
+        }
+    except Exception as e:
+        return None
+
+# إعدادات الذاكرة المؤقتة للنصوص على القرص
+CACHE_PATH = os.environ.get(
+    'TRANSCRIPT_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'youtube-transcript-pro', 'transcripts.db')
+)
+CACHE_TTL_SECONDS = int(os.environ.get('TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600))
+CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', 200)) * 1024 * 1024
+
+# محاولات فتح قاعدة مقفلة مؤقتاً من عملية أخرى، والانتظار بينها، ثم مهلة قبل إعادة المحاولة (بالثواني)
+CACHE_OPEN_ATTEMPTS = 2
+CACHE_OPEN_BACKOFF = 0.5
+CACHE_REOPEN_SECONDS = 30
+
+# أخطاء SQLite التي تعني أن الملف نفسه لا يُفتح (لا قفل عابر): مسار خاطئ، قراءة فقط، ملف تالف
+CACHE_UNUSABLE_ERRORS = (
+    sqlite3.SQLITE_CANTOPEN, sqlite3.SQLITE_READONLY, sqlite3.SQLITE_PERM,
+    sqlite3.SQLITE_NOTADB, sqlite3.SQLITE_CORRUPT, sqlite3.SQLITE_IOERR
+)
+
+# دالة فتح قاعدة الذاكرة المؤقتة
+def open_cache_database(path, schema, timeout=5):
+    """فتح قاعدة SQLite وإنشاء جداولها
+    
+    القفل المؤقت يُعاد بعده الفتح CACHE_OPEN_ATTEMPTS مرات ثم يُرفع الخطأ ليُعاد الفتح في الاستخدام
+    التالي؛ الملف الذي لا يُفتح أصلاً (مجلد للقراءة فقط، مسار خاطئ، ملف تالف) يُستبدل بقاعدة في الذاكرة.
+    """
+    for attempt in range(CACHE_OPEN_ATTEMPTS):
+        conn = None
+        try:
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=timeout)
+            conn.executescript(schema)
+            return conn
+        except OSError:
+            break
+        except sqlite3.Error as e:
+            if conn is not None:
+                conn.close()
+            if getattr(e, 'sqlite_errorcode', 0) & 0xff in CACHE_UNUSABLE_ERRORS:
+                break
+            if getattr(e, 'sqlite_errorcode', 0) & 0xff not in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+                raise
+            if attempt + 1 == CACHE_OPEN_ATTEMPTS:
+                raise
+            time.sleep(CACHE_OPEN_BACKOFF * (attempt + 1))
+    
+    logger.warning("cache database %s unavailable, using memory", path, exc_info=True)
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    try:
+        conn.executescript(schema)
+    except sqlite3.Error:
+        # مثل FTS5 غير متاح في SQLite هذه البيئة: لا بديل، فيصل الخطأ للمستدعي
+        conn.close()
+        logger.exception("cache database schema failed for %s", path)
+        raise
+    return conn
+
+# اتصال SQLite يُفتح عند أول استخدام
+class LazyDatabase:
+    """يُغلف open_cache_database: فشل الفتح (قفل) يُرفع كخطأ sqlite3 يعامله المستدعي كإخفاق،
+    ولا يُعاد الفتح قبل CACHE_REOPEN_SECONDS حتى لا تنتظر كل عملية مهلة القفل من جديد"""
+    
+    def __init__(self, path, schema, timeout=5):
+        self.path = path
+        self.schema = schema
+        self.timeout = timeout
+        self.conn = None
+        self.retry_at = 0
+    
+    def connect(self):
+        # يُستدعى داخل قفل المالك
+        if self.conn is None:
+            if time.time() < self.retry_at:
+                raise sqlite3.OperationalError(f"cache database {self.path} is locked, retrying later")
+            try:
+                self.conn = open_cache_database(self.path, self.schema, self.timeout)
+            except sqlite3.Error:
+                self.retry_at = time.time() + CACHE_REOPEN_SECONDS
+                raise
+        return self.conn
+    
+    def rollback(self):
+        try:
+            if self.conn is not None:
+                self.conn.rollback()
+        except sqlite3.Error:
+            pass
+
+# ذاكرة مؤقتة دائمة للنصوص مع انتهاء صلاحية وإخلاء الأقدم استخداماً
+class TranscriptCache:
+    """ذاكرة مؤقتة مبنية على SQLite مفتاحها معرف الفيديو ونوع المسار"""
+    
+    # جداول الذاكرة المؤقتة
+    SCHEMA = """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                cache_key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_accessed ON transcripts (accessed_at);
+        """
+    
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = LazyDatabase(path, self.SCHEMA)
+    
+    def connection(self):
+        return self._db.connect()
+    
+    @staticmethod
+    def make_key(video_id, track='default'):
+        """بناء مفتاح التخزين من معرف الفيديو ونوع المسار"""
+        return f"{video_id}:{track}"
+    
+    def get(self, video_id, track='default'):
+        """إرجاع البيانات المخزنة أو None عند عدم وجودها أو انتهاء صلاحيتها أو تعذر القراءة"""
+        key = self.make_key(video_id, track)
+        now = time.time()
+        
+        with self._lock:
+            try:
+                row = self.connection().execute(
+                    "SELECT payload, created_at FROM transcripts WHERE cache_key = ?", (key,)
+                ).fetchone()
+                
+                if row is None:
+                    self.misses += 1
+                    return None
+                
+                payload, created_at = row
+                if self.ttl and now - created_at > self.ttl:
+                    self.connection().execute("DELETE FROM transcripts WHERE cache_key = ?", (key,))
+                    self.connection().commit()
+                    self.misses += 1
+                    return None
+                
+                self.connection().execute("UPDATE transcripts SET accessed_at = ? WHERE cache_key = ?", (now, key))
+                self.connection().commit()
+                data = json.loads(payload)
+            except (sqlite3.Error, ValueError):
+                # خطأ في القاعدة يُعامل كإخفاق: الاستخراج من الشبكة يبقى ممكناً
+                logger.warning("transcript cache read failed for %s", key, exc_info=True)
+                self.misses += 1
+                return None
+            self.hits += 1
+        
+        return data
+    
+    def set(self, video_id, data, track='default'):
+        """تخزين البيانات ثم إخلاء الأقدم استخداماً عند تجاوز الحجم المسموح"""
+        key = self.make_key(video_id, track)
+        payload = json.dumps(data, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        now = time.time()
+        
+        with self._lock:
+            try:
+                self.connection().execute(
+                    "INSERT OR REPLACE INTO transcripts (cache_key, payload, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now)
+                )
+                self._evict()
+                self.connection().commit()
+            except sqlite3.Error:
+                # فشل الحفظ لا يُفشل استخراجاً نجح بالفعل
+                logger.warning("transcript cache write failed for %s", key, exc_info=True)
+                self._rollback()
+    
+    def _rollback(self):
+        self._db.rollback()
+    
+    def _evict(self):
+        """حذف المدخلات المنتهية ثم الأقل استخداماً حتى يعود الحجم ضمن الحد"""
+        if self.ttl:
+            self.connection().execute("DELETE FROM transcripts WHERE created_at < ?", (time.time() - self.ttl,))
+        
+        total = self.connection().execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self.connection().execute("SELECT cache_key, size FROM transcripts ORDER BY accessed_at").fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        self.connection().executemany("DELETE FROM transcripts WHERE cache_key = ?", stale_keys)
+    
+    def stats(self):
+        """إحصائيات الإصابة والإخفاق وحجم الذاكرة المؤقتة"""
+        with self._lock:
+            try:
+                entries, total = self.connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+                ).fetchone()
+            except sqlite3.Error:
+                logger.warning("transcript cache stats failed", exc_info=True)
+                entries, total = 0, 0
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'entries': entries,
+            'size_bytes': total
+        }
+    
+    def clear(self):
+        """مسح جميع المدخلات وتصفير العدادات"""
+        with self._lock:
+            try:
+                self.connection().execute("DELETE FROM transcripts")
+                self.connection().commit()
+            except sqlite3.Error:
+                logger.warning("transcript cache clear failed", exc_info=True)
+                self._rollback()
+            self.hits = 0
+            self.misses = 0
+
+# دالة الحصول على الذاكرة المؤقتة المشتركة بين الجلسات
+@lru_cache(maxsize=None)
+def get_transcript_cache():
+    """إنشاء نسخة واحدة من الذاكرة المؤقتة لكل عملية خادم"""
+    return TranscriptCache()
+
+# الحد الأقصى لعدد الترجمات المحفوظة على القرص
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', 500000))
+
+# دالة توحيد النص قبل الترجمة والتخزين
+def normalize_translation_text(text):
+    """توحيد ترميز Unicode والمسافات حتى تتطابق الأسطر المتكررة"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+# دالة حساب مفتاح الترجمة من محتوى النص
+def translation_cache_key(text):
+    """بصمة SHA-256 للنص الموحد"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# ذاكرة مؤقتة دائمة للترجمات على مستوى المقطع
+class TranslationCache:
+    """ذاكرة مؤقتة مبنية على SQLite مفتاحها بصمة النص ولغة المصدر ولغة الهدف"""
+    
+    # جداول ذاكرة الترجمة
+    SCHEMA = """
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (text_hash, source_lang, target_lang)
+            );
+            CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed_at);
+        """
+    
+    def __init__(self, path=CACHE_PATH, max_entries=TRANSLATION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = LazyDatabase(path, self.SCHEMA, timeout=30)
+    
+    def connection(self):
+        return self._db.connect()
+    
+    def get_many(self, keys, source_lang, target_lang):
+        """إرجاع قاموس {البصمة: الترجمة} للمفاتيح الموجودة فقط"""
+        keys = list(keys)
+        found = {}
+        
+        with self._lock:
+            try:
+                # SQLite يحد عدد المعاملات في الاستعلام الواحد
+                for i in range(0, len(keys), 500):
+                    batch = keys[i:i + 500]
+                    placeholders = ','.join('?' * len(batch))
+                    rows = self.connection().execute(
+                        f"SELECT text_hash, translation FROM translations "
+                        f"WHERE source_lang = ? AND target_lang = ? AND text_hash IN ({placeholders})",
+                        (source_lang, target_lang, *batch)
+                    ).fetchall()
+                    found.update(rows)
+                
+                if found:
+                    now = time.time()
+                    self.connection().executemany(
+                        "UPDATE translations SET accessed_at = ? "
+                        "WHERE text_hash = ? AND source_lang = ? AND target_lang = ?",
+                        [(now, key, source_lang, target_lang) for key in found]
+                    )
+                    self.connection().commit()
+            except sqlite3.Error:
+                # ما قُرئ قبل الخطأ يبقى صالحاً، والباقي يُترجم من الشبكة
+                logger.warning("translation cache read failed", exc_info=True)
+                self._rollback()
+            
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        
+        return found
+    
+    def set_many(self, translations, source_lang, target_lang):
+        """تخزين قاموس {البصمة: الترجمة} ثم إخلاء الأقدم استخداماً عند تجاوز الحد"""
+        now = time.time()
+        with self._lock:
+            try:
+                self.connection().executemany(
+                    "INSERT OR REPLACE INTO translations "
+                    "(text_hash, source_lang, target_lang, translation, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, source_lang, target_lang, text, now) for key, text in translations.items()]
+                )
+                
+                count = self.connection().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+                if count > self.max_entries:
+                    self.connection().execute(
+                        "DELETE FROM translations WHERE rowid IN "
+                        "(SELECT rowid FROM translations ORDER BY accessed_at LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                self.connection().commit()
+            except sqlite3.Error:
+                logger.warning("translation cache write failed", exc_info=True)
+                self._rollback()
+    
+    def _rollback(self):
+        self._db.rollback()
+    
+    def stats(self):
+        """إحصائيات الإصابة والإخفاق وعدد الترجمات المحفوظة"""
+        with self._lock:
+            try:
+                entries = self.connection().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            except sqlite3.Error:
+                logger.warning("translation cache stats failed", exc_info=True)
+                entries = 0
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'entries': entries
+        }
+
+# دالة الحصول على ذاكرة الترجمة المشتركة بين الجلسات
+@lru_cache(maxsize=None)
+def get_translation_cache():
+    """إنشاء نسخة واحدة من ذاكرة الترجمة لكل عملية خادم"""
+    return TranslationCache()
+
+# مسار فهرس البحث الشامل في كل النصوص (قيمة فارغة تعطله)
+CORPUS_PATH = os.environ.get(
+    'TRANSCRIPT_CORPUS_PATH',
+    ':memory:' if CACHE_PATH == ':memory:' else os.path.join(os.path.dirname(CACHE_PATH), 'corpus.db')
+)
+
+# عدد نتائج صفحة البحث الشامل، وعدد كلمات المقتطف حول المطابقة
+CORPUS_PAGE_SIZE = 20
+CORPUS_SNIPPET_TOKENS = 16
+
+# رابط يفتح الفيديو عند ثانية محددة
+VIDEO_DEEP_LINK = "https://www.youtube.com/watch?v={video_id}&t={seconds}s"
+
+# إصدار صيغة النص المفهرس؛ تغييره يعيد فهرسة كل فيديو عند استخراجه التالي
+# (2: التشكيل يُحذف قبل الفهرسة لأن unicode61 يعامل الحركات كفواصل بين الحروف)
+CORPUS_TEXT_VERSION = 2
+
+# دالة تحويل استعلام المستخدم إلى تعبير FTS5
+def corpus_match_expression(query):
+    """نفس قواعد TranscriptIndex: العبارات بين علامتي تنصيص حرفية، وباقي الكلمات كلها مطلوبة
+    وآخرها بادئة؛ كل كلمة تُحاط بعلامتي تنصيص فلا تُفسر أي رموز من المستخدم كصيغة FTS5"""
+    # التشكيل يُحذف كما في النص المفهرس، وإلا صارت 'كَتَبَ' ثلاثة حروف منفصلة
+    query = strip_marks(query)
+    parts = []
+    for phrase in re.findall(r'"([^"]*)"', query):
+        words = TOKEN_PATTERN.findall(phrase.lower())
+        if words:
+            parts.append('"' + ' '.join(words) + '"')
+    
+    # علامة تنصيص دون إغلاق (أثناء الكتابة) تُهمل فتبقى كلماتها عادية وآخرها بادئة
+    words = TOKEN_PATTERN.findall(re.sub(r'"[^"]*"', ' ', query).lower())
+    parts.extend(f'"{word}"' for word in words[:-1])
+    if words:
+        parts.append(f'"{words[-1]}"*')
+    return ' AND '.join(parts)
+
+# فهرس البحث الشامل في كل النصوص المستخرجة
+class CorpusIndex:
+    """فهرس SQLite FTS5 بصف لكل مقطع (معرف الفيديو ووقت البداية والنص)
+    
+    segments جدول عادي مفهرس بمعرف الفيديو، وsegments_fts فهرس نصي خارجي المحتوى
+    تبقيه المشغلات (triggers) متزامناً معه؛ إعادة فهرسة فيديو تحذف مقاطعه القديمة فقط.
+    """
+    
+    # الجداول والفهرس النصي ومشغلات المزامنة
+    SCHEMA = """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                title TEXT,
+                uploader TEXT,
+                language TEXT,
+                duration INTEGER,
+                segments INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                start REAL NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_segments_video ON segments (video_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                text, content='segments', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+                INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+                INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """
+    
+    def __init__(self, path=CORPUS_PATH):
+        self._lock = threading.Lock()
+        self._db = LazyDatabase(path, self.SCHEMA)
+    
+    def connection(self):
+        return self._db.connect()
+    
+    def ingest(self, video_id, transcript_data, video_info=None, language=None):
+        """إضافة نص فيديو أو استبداله إن تغير محتواه؛ False إن كان مفهرساً بالمحتوى نفسه"""
+        digest = f"{transcript_data.digest()}:{CORPUS_TEXT_VERSION}"
+        video_info = video_info or {}
+        
+        with self._lock:
+            row = self.connection().execute("SELECT digest FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            
+            with self.connection():
+                self.connection().execute("DELETE FROM segments WHERE video_id = ?", (video_id,))
+                self.connection().executemany(
+                    "INSERT INTO segments (video_id, start, text) VALUES (?, ?, ?)",
+                    ((video_id, transcript_data.start_at(i), strip_marks(transcript_data.text_at(i)))
+                     for i in range(len(transcript_data)))
+                )
+                self.connection().execute(
+                    "INSERT OR REPLACE INTO videos "
+                    "(video_id, title, uploader, language, duration, segments, digest, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, video_info.get('title'), video_info.get('uploader'), language,
+                     video_info.get('duration'), len(transcript_data), digest, time.time())
+                )
+        return True
+    
+    def search(self, query, page=0, page_size=CORPUS_PAGE_SIZE, uploader=None):
+        """نتائج مرتبة بـ bm25 لصفحة واحدة: {'total', 'page', 'pages', 'results', 'seconds'}
+        حيث كل نتيجة فيها الفيديو ووقت المقطع ومقتطف مميز ورابط يفتح الفيديو عنده"""
+        started = time.perf_counter()
+        empty = {'total': 0, 'page': 0, 'pages': 0, 'results': [], 'seconds': 0}
+        expression = corpus_match_expression(query)
+        if not expression:
+            return empty
+        
+        where = "segments_fts MATCH ?"
+        params = [expression]
+        if uploader:
+            where += " AND v.uploader = ?"
+            params.append(uploader)
+        joins = ("FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+                 "JOIN videos v ON v.video_id = s.video_id")
+        
+        try:
+            with self._lock:
+                total = self.connection().execute(f"SELECT COUNT(*) {joins} WHERE {where}", params).fetchone()[0]
+                pages = max(1, math.ceil(total / page_size))
+                page = min(max(0, page), pages - 1)
+                rows = self.connection().execute(
+                    f"SELECT s.video_id, s.start, v.title, v.uploader, "
+                    f"snippet(segments_fts, 0, '**', '**', '…', {CORPUS_SNIPPET_TOKENS}), rank "
+                    f"{joins} WHERE {where} ORDER BY rank LIMIT ? OFFSET ?",
+                    params + [page_size, page * page_size]
+                ).fetchall()
+        except sqlite3.OperationalError:
+            return empty
+        
+        results = [
+            {
+                'video_id': video_id,
+                'title': title or video_id,
+                'uploader': uploader_name,
+                'timestamp': start,
+                'time': format_timestamp(start),
+                'text': snippet,
+                'url': VIDEO_DEEP_LINK.format(video_id=video_id, seconds=int(start)),
+                'score': round(-score, 3)
+            }
+            for video_id, start, title, uploader_name, snippet, score in rows
+        ]
+        return {'total': total, 'page': page, 'pages': pages, 'results': results,
+                'seconds': round(time.perf_counter() - started, 4)}
+    
+    def uploaders(self):
+        """أسماء القنوات المفهرسة (لتصفية البحث)"""
+        try:
+            with self._lock:
+                rows = self.connection().execute(
+                    "SELECT DISTINCT uploader FROM videos WHERE uploader IS NOT NULL ORDER BY uploader"
+                ).fetchall()
+        except sqlite3.Error:
+            logger.warning("corpus uploaders failed", exc_info=True)
+            return []
+        return [row[0] for row in rows]
+    
+    def stats(self):
+        try:
+            with self._lock:
+                videos, segments = self.connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(segments), 0) FROM videos"
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning("corpus stats failed", exc_info=True)
+            videos, segments = 0, 0
+        return {'videos': videos, 'segments': segments}
+
+# دالة الحصول على فهرس البحث الشامل المشترك بين الجلسات
+@lru_cache(maxsize=None)
+def get_corpus_index():
+    return CorpusIndex()
+
+# دالة إضافة نتيجة استخراج إلى فهرس البحث الشامل
+def index_in_corpus(video_id, result):
+    """فشل الفهرسة لا يوقف الاستخراج؛ ترجع True إن أُضيف محتوى جديد"""
+    if not CORPUS_PATH:
+        return False
+    try:
+        with stage('corpus_ingest', segments=len(result['transcript_data'])):
+            return get_corpus_index().ingest(
+                video_id, result['transcript_data'], result.get('video_info'), result.get('language')
+            )
+    except Exception:
+        logger.exception("corpus ingest failed for %s", video_id)
+        return False
+
+# مجلد ملفات التصدير المحفوظة لكل فيديو وصيغة
+EXPORT_DIR = os.environ.get('TRANSCRIPT_EXPORT_DIR', os.path.join(os.path.dirname(CACHE_PATH), 'exports'))
+
+# دالة توليد النص الكامل
+def iter_plain_text(transcript_data, meta=None):
+    """النص الكامل قطعة واحدة دون نسخ إضافية"""
+    yield Transcript.from_segments(transcript_data).full_text
+    yield '\n'
+
+# دالة توليد النص مع الطوابع الزمنية
+def iter_timed_text(transcript_data, meta=None):
+    """أسطر '[MM:SS] النص' واحداً تلو الآخر"""
+    return Transcript.from_segments(transcript_data).iter_timed_lines()
+
+# دالة توليد ملف SRT
+def iter_srt(transcript_data, meta=None):
+    """كتل SRT واحدة تلو الأخرى"""
+    for index, (start, end, text) in enumerate(iter_segment_timings(transcript_data), 1):
+        if index > 1:
+            yield '\n'
+        yield f"{index}\n{format_subtitle_time(start, ',')} --> {format_subtitle_time(end, ',')}\n{text}\n"
+
+# دالة توليد ملف WebVTT
+def iter_vtt(transcript_data, meta=None):
+    """ترويسة WebVTT ثم الكتل واحدة تلو الأخرى"""
+    yield "WEBVTT\n"
+    for start, end, text in iter_segment_timings(transcript_data):
+        yield f"\n{format_subtitle_time(start)} --> {format_subtitle_time(end)}\n{text}\n"
+
+# دالة توليد مقاطع JSONL
+def iter_jsonl(transcript_data, meta=None):
+    """سطر JSON لكل مقطع مع معرف الفيديو إن وُجد"""
+    video_id = (meta or {}).get('video_id')
+    for start, end, text in iter_segment_timings(transcript_data):
+        row = {'video_id': video_id, 'start': round(start, 3), 'end': round(end, 3), 'text': text}
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+# دالة توليد التقرير الشامل بصيغة Markdown
+def iter_markdown_report(transcript_data, meta=None):
+    """تقرير Markdown: معلومات الفيديو والإحصائيات والنص الكامل والنص مع الأوقات"""
+    meta = meta or {}
+    video_info = meta.get('video_info') or {}
+    analysis = meta.get('analysis')
+    
+    yield f"""# تقرير تفصيلي - YouTube Transcript Pro
+
+## معلومات الفيديو
+- **العنوان:** {video_info.get('title', 'غير متوفر')}
+- **القناة:** {video_info.get('uploader', 'غير متوفر')}
+- **المدة:** {(video_info.get('duration') or 0) // 60} دقيقة
+- **المشاهدات:** {video_info.get('view_count') or 0:,} مشاهدة
+- **اللغة:** {meta.get('language')}
+- **تاريخ الاستخراج:** {time.strftime('%Y-%m-%d %H:%M:%S')}
+
+## إحصائيات النص
+"""
+    
+    if analysis:
+        yield f"""
+- **إجمالي الكلمات:** {analysis['total_words']:,}
+- **إجمالي الجمل:** {analysis['total_sentences']:,}
+- **الكلمات الفريدة:** {analysis['unique_words']:,}
+- **وقت القراءة المقدر:** {analysis['reading_time_minutes']} دقيقة
+- **متوسط طول الجملة:** {analysis['avg_sentence_length']} كلمة
+
+### أهم الكلمات المتكررة:
+"""
+        for word, count in analysis['top_words'][:10]:
+            yield f"- {word}: {count} مرة\n"
+    
+    transcript = Transcript.from_segments(transcript_data)
+    yield "\n\n## النص الكامل\n"
+    yield transcript.full_text
+    yield "\n\n## النص مع الطوابع الزمنية\n"
+    yield from transcript.iter_timed_lines()
+    yield """
+---
+تم إنشاؤه بواسطة YouTube Transcript Pro
+تطبيق مجاني 100% لاستخراج وتحليل نصوص اليوتيوب
+"""
+
+# صيغ التصدير: الامتداد: (نوع MIME، دالة التوليد)
+EXPORT_FORMATS = {
+    'txt': ('text/plain', iter_plain_text),
+    'timed.txt': ('text/plain', iter_timed_text),
+    'srt': ('application/x-subrip', iter_srt),
+    'vtt': ('text/vtt', iter_vtt),
+    'jsonl': ('application/jsonl', iter_jsonl),
+    'md': ('text/markdown', iter_markdown_report),
+}
+
+# دالة كتابة قطع متتالية إلى ملف
+def write_chunks(chunks, path):
+    """كتابة مولد نصوص إلى ملف مؤقت ثم نقله ذرياً إلى المسار النهائي؛ ترجع عدد البايتات"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporary, 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return os.path.getsize(path)
+
+# دالة حذف ملفات التصدير القديمة
+def prune_exports(directory=EXPORT_DIR, max_age=CACHE_TTL_SECONDS):
+    """حذف ملفات التصدير التي لم تُستخدم منذ max_age ثانية"""
+    if not max_age or not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_atime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+# دالة الحصول على ملف تصدير (يُنشأ عند أول طلب فقط)
+def export_file(transcript_data, fmt, meta=None, directory=EXPORT_DIR):
+    """مسار ملف التصدير بالصيغة fmt؛ يُكتب بالتدفق مرة واحدة لكل فيديو ومحتوى ثم يعاد استخدامه"""
+    _, writer = EXPORT_FORMATS[fmt]
+    transcript = Transcript.from_segments(transcript_data)
+    meta = meta or {}
+    
+    # التقرير يتضمن معلومات الفيديو والتحليل، فتدخل في البصمة
+    digest = transcript.digest()
+    if fmt == 'md':
+        extra = json.dumps([meta.get('language'), meta.get('video_info'), meta.get('analysis')],
+                           ensure_ascii=False, sort_keys=True, default=str)
+        digest = hashlib.sha1((digest + extra).encode('utf-8')).hexdigest()
+    
+    path = os.path.join(directory, f"{meta.get('video_id') or 'transcript'}.{digest[:16]}.{fmt}")
+    if not os.path.exists(path):
+        prune_exports(directory)
+        write_chunks(writer(transcript, meta), path)
+    else:
+        os.utime(path)
+    return path
+
+# دالة قراءة ملف كبايتات
+def read_bytes(path):
+    """محتوى الملف مع إغلاقه فوراً (لأزرار التحميل التي تقرأ عند الطلب)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+# دالة قراءة ملف تصدير كبايتات
+def export_bytes(transcript_data, fmt, meta=None):
+    """محتوى ملف التصدير (للتحميل من الواجهة)"""
+    return read_bytes(export_file(transcript_data, fmt, meta))
+
+# إعدادات التعرف الصوتي الاحتياطي عند غياب أي نص (TRANSCRIPT_ASR_BACKEND=none لتعطيله)
+ASR_BACKEND = os.environ.get('TRANSCRIPT_ASR_BACKEND', 'whisper')
+ASR_MODEL = os.environ.get('TRANSCRIPT_ASR_MODEL', 'base')
+ASR_MAX_WORKERS = int(os.environ.get('TRANSCRIPT_ASR_WORKERS', 2))
+ASR_SAMPLE_RATE = 16000
+
+# طول المقطع الصوتي المستهدف، ونافذة البحث عن أهدأ نقطة للقطع حوله، وطول إطار قياس الطاقة (بالثواني)
+ASR_CHUNK_SECONDS = 60
+ASR_SILENCE_SEARCH_SECONDS = 5
+ASR_FRAME_SECONDS = 0.02
+
+# محرك Whisper بنماذج محملة مرة واحدة لكل عملية
+class WhisperBackend:
+    """محرك openai-whisper على المعالج؛ يحتفظ بمجموعة نماذج محملة يعاد استخدامها بين الطلبات
+    
+    كل خيط يأخذ نموذجاً من المجموعة ويعيده بعد الانتهاء، فلا يُحمّل أكثر من نموذج لكل
+    خيط متزامن. ASR_MODEL يقبل اسم نموذج ('base') أو مسار ملف نموذج محلي.
+    """
+    
+    name = 'whisper'
+    
+    def __init__(self, model=ASR_MODEL, device='cpu'):
+        self.model_name = model
+        self.device = device
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        import whisper
+        return whisper.load_model(self.model_name, device=self.device)
+    
+    def _release(self, model):
+        with self._lock:
+            self._idle.append(model)
+    
+    def transcribe(self, audio, language=None):
+        """تفريغ مقطع صوتي (float32 بتردد ASR_SAMPLE_RATE): ([{'start','end','text'}], اللغة)"""
+        model = self._acquire()
+        try:
+            result = model.transcribe(audio, language=language, fp16=False,
+                                      condition_on_previous_text=False, verbose=None)
+        finally:
+            self._release(model)
+        
+        segments = [
+            {'start': float(segment['start']), 'end': float(segment['end']), 'text': segment['text'].strip()}
+            for segment in result.get('segments', [])
+        ]
+        return segments, result.get('language')
+
+# محركات التعرف الصوتي المتاحة (الاسم: دالة إنشاء)
+ASR_BACKENDS = {'whisper': WhisperBackend}
+
+# دالة تسجيل محرك تعرف صوتي بديل
+def register_asr_backend(name, factory):
+    """factory() تُرجع كائناً له transcribe(audio, language=None) -> (segments, language)"""
+    ASR_BACKENDS[name] = factory
+    get_asr_backend.cache_clear()
+
+# دالة الحصول على محرك التعرف الصوتي المشترك
+@lru_cache(maxsize=None)
+def get_asr_backend(name=ASR_BACKEND):
+    """نسخة واحدة من المحرك لكل عملية حتى لا يعاد تحميل النموذج في كل طلب"""
+    return ASR_BACKENDS[name]()
+
+# دالة التحقق من توفر التعرف الصوتي
+def asr_available(name=ASR_BACKEND):
+    """هل المحرك مسجل ومكتباته متوفرة؟ (Whisper يحتاج الحزمة وffmpeg)"""
+    if name not in ASR_BACKENDS:
+        return False
+    if ASR_BACKENDS[name] is WhisperBackend:
+        import importlib.util
+        import shutil
+        return importlib.util.find_spec('whisper') is not None and shutil.which('ffmpeg') is not None
+    return True
+
+# دالة قراءة ملف صوتي كمصفوفة
+def load_audio(path, sample_rate=ASR_SAMPLE_RATE):
+    """فك ترميز أي ملف صوتي/مرئي عبر ffmpeg إلى float32 أحادي القناة"""
+    import subprocess
+    import numpy as np
+    
+    command = ['ffmpeg', '-nostdin', '-i', path, '-f', 's16le', '-ac', '1',
+               '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-']
+    output = subprocess.run(command, capture_output=True, check=True).stdout
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+# دالة تقسيم الصوت عند فترات الصمت
+def split_on_silence(audio, sample_rate=ASR_SAMPLE_RATE, chunk_seconds=ASR_CHUNK_SECONDS,
+                     search_seconds=ASR_SILENCE_SEARCH_SECONDS, frame_seconds=ASR_FRAME_SECONDS):
+    """حدود المقاطع [(بداية، نهاية)] بالعينات: كل قطع عند أهدأ إطار قرب المضاعف التالي لـ chunk_seconds"""
+    import numpy as np
+    
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = max(1, int(frame_seconds * sample_rate))
+    if len(audio) <= chunk + search:
+        return [(0, len(audio))]
+    
+    # طاقة RMS لكل إطار
+    frame_count = len(audio) // frame
+    energy = np.sqrt(np.mean(np.square(audio[:frame_count * frame].reshape(frame_count, frame)), axis=1))
+    
+    bounds = [0]
+    while len(audio) - bounds[-1] > chunk + search:
+        target = bounds[-1] + chunk
+        low = max((target - search) // frame, bounds[-1] // frame + 1)
+        high = min((target + search) // frame, frame_count)
+        cut = (low + int(np.argmin(energy[low:high]))) * frame
+        bounds.append(cut)
+    bounds.append(len(audio))
+    
+    return list(zip(bounds[:-1], bounds[1:]))
+
+# دالة تفريغ مصفوفة صوتية بالتوازي
+def transcribe_audio(audio, backend=None, sample_rate=ASR_SAMPLE_RATE, max_workers=ASR_MAX_WORKERS,
+                     language=None, on_progress=None):
+    """تقسيم الصوت عند الصمت وتفريغ المقاطع بالتوازي، ثم دمجها بأوقات مطلقة
+    
+    ترجع (قائمة مقاطع بنفس بنية مسار النصوص، اللغة المكتشفة، عدد المقاطع الصوتية).
+    """
+    backend = backend or get_asr_backend()
+    chunks = split_on_silence(audio, sample_rate)
+    results = [None] * len(chunks)
+    done = 0
+    
+    def run(index):
+        start, end = chunks[index]
+        return backend.transcribe(audio[start:end], language)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        futures = {executor.submit(run, index): index for index in range(len(chunks))}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            report(on_progress, 'status', f"🎙️ تم تفريغ {done} من {len(chunks)} مقطع صوتي")
+    
+    segments = []
+    languages = Counter()
+    for (start, _), (chunk_segments, chunk_language) in zip(chunks, results):
+        offset = start / sample_rate
+        if chunk_language:
+            languages[chunk_language] += 1
+        for segment in chunk_segments:
+            text = clean_subtitle_text(segment['text'])
+            if text:
+                segments.append({'start': segment['start'] + offset, 'end': segment['end'] + offset, 'text': text})
+    
+    detected = languages.most_common(1)[0][0] if languages else language
+    return segments, detected, len(chunks)
+
+# دالة التعرف الصوتي على فيديو دون نصوص
+def transcribe_video(youtube_url, on_progress=None, backend=None):
+    """تحميل الصوت فقط وتفريغه محلياً: (Transcript، اللغة، إحصائيات) أو (None, None, None)"""
+    
+    try:
+        import tempfile
+        import yt_dlp
+        
+        backend = backend or get_asr_backend()
+        report(on_progress, 'info', f"🎙️ لا توجد نصوص، جاري التعرف الصوتي ({getattr(backend, 'name', 'asr')})...")
+        
+        with tempfile.TemporaryDirectory() as directory:
+            opts = dict(YDL_OPTS, format='bestaudio/best', skip_download=False, noplaylist=True,
+                        writesubtitles=False, writeautomaticsub=False,
+                        outtmpl=os.path.join(directory, '%(id)s.%(ext)s'))
+            with stage('asr_audio_download') as span, yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(youtube_url, download=True)
+                path = ydl.prepare_filename(info)
+                span['bytes'] = os.path.getsize(path)
+            
+            report(on_progress, 'status', "🎙️ فك ترميز الصوت...")
+            with stage('asr_decode'):
+                audio = load_audio(path)
+        
+        audio_seconds = len(audio) / ASR_SAMPLE_RATE
+        started = time.time()
+        with stage('asr_transcribe', audio_seconds=round(audio_seconds, 1)) as span:
+            segments, language, chunk_count = transcribe_audio(audio, backend, on_progress=on_progress)
+            span['segments'] = len(segments)
+        elapsed = time.time() - started
+        report(on_progress, 'clear', '')
+        
+        if not segments:
+            report(on_progress, 'error', "❌ لم يتعرف المحرك على أي كلام")
+            return None, None, None
+        
+        stats = {
+            'backend': getattr(backend, 'name', 'asr'),
+            'model': getattr(backend, 'model_name', None),
+            'audio_seconds': round(audio_seconds, 1),
+            'seconds': round(elapsed, 1),
+            'chunks': chunk_count,
+            'realtime_factor': round(elapsed / audio_seconds, 3) if audio_seconds else None
+        }
+        report(on_progress, 'success',
+               f"✅ تم التعرف الصوتي على {len(segments)} مقطع (عامل الزمن الحقيقي: {stats['realtime_factor']})")
+        return Transcript.from_segments(segments), f"{language or 'غير معروفة'} (تعرف صوتي)", stats
+        
+    except Exception as e:
+        report(on_progress, 'error', f"❌ خطأ في التعرف الصوتي: {str(e)}")
+        return None, None, None
+
+# دالة مفتاح الذاكرة المؤقتة لتفضيلات اللغة
+def preference_track_key(preferred_langs=()):
+    """'default' دون تفضيلات، وإلا اللغات بترتيبها ('ar,en')"""
+    return ','.join(base_language(lang) for lang in preferred_langs) or 'default'
+
+# دالة استخراج النص وتحليله عند الضغط على الزر
+def run_extraction(youtube_url, video_id, on_progress=None, preferred_langs=(), keep_tracks=False):
+    """استخراج النص من الذاكرة المؤقتة أو من الشبكة وإرجاع نتيجة قابلة للحفظ في الجلسة
+    
+    أزمنة مراحل الطلب تُرسل في النهاية (نجح أو فشل) كرسالة 'trace' إلى on_progress.
+    keep_tracks يبقي جداول النصوص (subtitle_tables) في النتيجة لتحميل لغات أخرى دون طلب
+    extract_info ثانٍ؛ تكون None عند التحميل من الذاكرة المؤقتة.
+    """
+    with trace_request('extraction', video_id=video_id) as trace:
+        result = extract_transcript(youtube_url, video_id, on_progress, preferred_langs, trace)
+    report(on_progress, 'trace', trace.to_dict())
+    if result and not keep_tracks:
+        result.pop('subtitle_tables', None)
+    return result
+
+# فترة إعادة فحص الذاكرة المؤقتة أثناء انتظار استخراج جارٍ للفيديو نفسه في جلسة أخرى (بالثواني)
+SINGLE_FLIGHT_TIMEOUT = 30
+
+# منسق التنفيذ الواحد لكل مفتاح
+class SingleFlight:
+    """أول طلب لمفتاح ينفذ العمل، والطلبات المتزامنة للمفتاح نفسه تنتظر نتيجته بدلاً من تكراره"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+    
+    def do(self, key, fn, on_wait=None, timeout=SINGLE_FLIGHT_TIMEOUT, check=None):
+        """إرجاع (النتيجة، مشتركة؟). استثناء المنفذ يصل لكل المنتظرين
+        
+        المنتظر يستدعي check() كل timeout ثانية (نتيجة محفوظة أو None) ويبقى منتظراً ما دام
+        المنفذ يعمل، فالتعرف الصوتي الطويل لا يطلق تنفيذات مكررة؛ إن أُلغي المنفذ (إيقاف الجلسة)
+        يعيد المنتظرون الطلب فيصبح أحدهم المنفذ الجديد.
+        """
+        with self.lock:
+            future = self.flights.get(key)
+            leader = future is None
+            if leader:
+                future = self.flights[key] = Future()
+        
+        metrics = get_metrics()
+        if not leader:
+            metrics.increment('transcript_single_flight_total', role='follower')
+            if on_wait:
+                on_wait()
+            with stage('single_flight_wait'):
+                while True:
+                    try:
+                        return future.result(timeout), True
+                    except CancelledError:
+                        break
+                    except FutureTimeoutError:
+                        result = check() if check else None
+                        if result is not None:
+                            return result, True
+            return self.do(key, fn, timeout=timeout, check=check)
+        
+        metrics.increment('transcript_single_flight_total', role='leader')
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # المفتاح يُحذف قبل الإلغاء حتى يجد المنتظرون مكاناً فارغاً عند إعادة الطلب
+            with self.lock:
+                if self.flights.get(key) is future:
+                    del self.flights[key]
+            # BaseException (مثل إيقاف السكربت) لا تُمرر للمنتظرين: يُلغى الطلب فيعيدونه
+            if not future.done():
+                future.cancel()
+
+# دالة الحصول على منسق الاستخراج المشترك بين كل الجلسات
+@lru_cache(maxsize=None)
+def get_extraction_flights():
+    return SingleFlight()
+
+# دالة قراءة نتيجة محفوظة في الذاكرة المؤقتة
+def cached_transcript(video_id, track_key):
+    """النتيجة المحفوظة مع Transcript بدل قائمة المقاطع، أو None"""
+    cached = get_transcript_cache().get(video_id, track_key)
+    if not cached:
+        return None
+    return dict(cached, transcript_data=Transcript.from_segments(cached['transcript_data']))
+
+# دالة مراحل الاستخراج داخل طلب متتبع
+def extract_transcript(youtube_url, video_id, on_progress, preferred_langs, trace):
+    # البحث في الذاكرة المؤقتة قبل الاتصال بالشبكة (المسار المختار يتبع تفضيلات اللغة)
+    track_key = preference_track_key(preferred_langs)
+    with stage('cache_lookup'):
+        result = cached_transcript(video_id, track_key)
+    
+    if result:
+        trace.status = 'cached'
+        report(on_progress, 'info', "⚡ تم تحميل النص من الذاكرة المؤقتة")
+    else:
+        # منفذ سابق ربما أنهى الاستخراج بين البحث في الذاكرة المؤقتة وبدء هذا التنفيذ
+        def load():
+            return (cached_transcript(video_id, track_key) or
+                    fetch_transcript(youtube_url, video_id, track_key, on_progress, preferred_langs, trace))
+        
+        # استخراج واحد لكل فيديو ومسار مهما تعددت الجلسات التي تطلبه في اللحظة نفسها
+        try:
+            result, shared = get_extraction_flights().do(
+                (video_id, track_key), load,
+                on_wait=lambda: report(on_progress, 'info', "⏳ هذا الفيديو قيد الاستخراج في جلسة أخرى، بانتظار النتيجة..."),
+                check=lambda: cached_transcript(video_id, track_key)
+            )
+        except Exception as e:
+            report(on_progress, 'error', f"❌ {str(e)}")
+            trace.status = 'error'
+            return None
+        if shared:
+            trace.status = 'shared' if result else 'empty'
+        if not result:
+            return None
+    
+    # فهرس البحث الشامل يتحقق من البصمة فلا يعيد فهرسة نص لم يتغير
+    index_in_corpus(video_id, result)
+    
+    # الفهرس المعكوس يُبنى مرة واحدة ويبقى في الجلسة لكل عمليات البحث
+    # (يبقى في هذا الخيط: نقل الفهرس من عملية أخرى يكلف نصف زمن بنائه تقريباً ويُفك هنا على أي حال)
+    transcript_data = result['transcript_data']
+    with stage('index', segments=len(transcript_data)):
+        search_index = TranscriptIndex(transcript_data)
+    return dict(result, video_id=video_id, search_index=search_index)
+
+# دالة استخراج النص من الشبكة وتحليله وحفظه في الذاكرة المؤقتة
+def fetch_transcript(youtube_url, video_id, track_key, on_progress, preferred_langs, trace):
+    """نتيجة الاستخراج دون الفهرس (مشتركة بين الجلسات المنتظرة) أو None"""
+    # استخراج بيانات الفيديو وجداول النصوص مرة واحدة
+    video_data = extract_video_data(youtube_url, on_progress)
+    if not video_data:
+        trace.status = 'error'
+        return None
+    
+    # استخراج النصوص
+    transcript_data, language = get_transcript_with_ytdlp(video_data, on_progress, preferred_langs)
+    
+    # لا توجد نصوص: التعرف الصوتي المحلي إن كان متاحاً؛ أما فشل تحميل مسار موجود (خطأ شبكة
+    # مؤقت مثلاً) فيبقى فشلاً ولا يستدعي تحميل الصوت وتفريغه كاملاً
+    asr_stats = None
+    has_tracks = bool(rank_subtitle_tracks(video_data))
+    if not transcript_data and not has_tracks and asr_available():
+        transcript_data, language, asr_stats = transcribe_video(youtube_url, on_progress)
+    if not transcript_data:
+        trace.status = 'error' if has_tracks else 'empty'
+        return None
+    
+    # تحليل النص
+    report(on_progress, 'status', "🔍 تحليل النص...")
+    # حساب خالص: في مجمع العمليات حتى لا يحجز GIL عن الجلسات والمهام الأخرى
+    with stage('analysis', segments=len(transcript_data)):
+        analysis = run_in_process(analyze_text, transcript_data.full_text)
+    report(on_progress, 'clear', '')
+    
+    result = {
+        'transcript_data': transcript_data,
+        'language': language,
+        'video_info': video_data['video_info'],
+        'analysis': analysis,
+        'asr': asr_stats
+    }
+    with stage('cache_store'):
+        get_transcript_cache().set(video_id, dict(result, transcript_data=transcript_data.to_list()), track_key)
+    # روابط المسارات موقعة وتنتهي صلاحيتها، لذا لا تُحفظ في الذاكرة المؤقتة
+    result['subtitle_tables'] = {key: video_data[key] for key in ('subtitles', 'automatic_captions', 'language')}
+    return result
+
+# إعدادات المعالجة الدفعية لقوائم التشغيل والقنوات
+BATCH_MAX_WORKERS = 4
+BATCH_MAX_VIDEOS = 500
+
+# أنماط روابط قوائم التشغيل والقنوات
+COLLECTION_URL_PATTERN = re.compile(
+    r'youtube\.com/(?:playlist\?|.*[?&]list=|channel/|c/|user/|@)', re.IGNORECASE
+)
+CHANNEL_URL_PATTERN = re.compile(
+    r'^(?P<base>https?://(?:www\.|m\.)?youtube\.com/(?:channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+|@[^/?#]+))/?(?P<tab>[^?#]*)',
+    re.IGNORECASE
+)
+
+# دالة التحقق من أن الرابط قائمة تشغيل أو قناة
+def is_collection_url(url):
+    """هل الرابط قائمة تشغيل أو قناة وليس فيديو واحداً؟"""
+    return bool(COLLECTION_URL_PATTERN.search(url or ''))
+
+# دالة توسيع قائمة تشغيل أو قناة إلى فيديوهات
+def expand_collection(url, limit=BATCH_MAX_VIDEOS):
+    """استخراج مسطح (دون بيانات كل فيديو) لقائمة الفيديوهات: (عنوان المجموعة، [{'id','url','title'}])"""
+    # رابط القناة دون تبويب يعيد التبويبات نفسها، لذا نطلب تبويب الفيديوهات مباشرة
+    match = CHANNEL_URL_PATTERN.match(url)
+    if match and not match.group('tab'):
+        url = match.group('base') + '/videos'
+    
+    import yt_dlp
+    
+    opts = dict(YDL_OPTS, extract_flat='in_playlist', playlistend=limit, writesubtitles=False, writeautomaticsub=False)
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    
+    videos = []
+    seen = set()
+    for entry in info.get('entries') or []:
+        video_id = entry and entry.get('id')
+        if not video_id or video_id in seen or entry.get('ie_key') not in (None, 'Youtube'):
+            continue
+        seen.add(video_id)
+        videos.append({
+            'id': video_id,
+            'url': f"https://www.youtube.com/watch?v={video_id}",
+            'title': entry.get('title') or video_id
+        })
+        if len(videos) >= limit:
+            break
+    
+    return info.get('title') or url, videos
+
+# دالة معالجة فيديو واحد ضمن دفعة
+def process_batch_video(video, preferred_langs=()):
+    """استخراج نص فيديو واحد دون واجهة: من الذاكرة المؤقتة أو من الشبكة؛ يرفع استثناء عند الفشل"""
+    with trace_request('batch_video', video_id=video['id']) as trace:
+        track_key = preference_track_key(preferred_langs)
+        with stage('cache_lookup'):
+            result = cached_transcript(video['id'], track_key)
+        if result:
+            trace.status = 'cached'
+            index_in_corpus(video['id'], result)
+            return dict(result, cached=True)
+        
+        # نفس منسق الواجهة: دفعة وجلسة تطلبان الفيديو نفسه معاً تشتركان في استخراج واحد
+        result, shared = get_extraction_flights().do(
+            (video['id'], track_key),
+            lambda: (cached_transcript(video['id'], track_key) or
+                     fetch_batch_transcript(video, track_key, preferred_langs)),
+            check=lambda: cached_transcript(video['id'], track_key)
+        )
+        if shared:
+            trace.status = 'shared'
+        if not result:
+            raise LookupError("لا توجد نصوص متاحة")
+        index_in_corpus(video['id'], result)
+        return dict(result, cached=False)
+
+# دالة استخراج نص فيديو من الدفعة من الشبكة
+def fetch_batch_transcript(video, track_key, preferred_langs=()):
+    """مثل fetch_transcript دون رسائل تقدم، مع أول مسار فقط؛ يرفع استثناء عند الفشل"""
+    import yt_dlp
+    
+    with stage('extract_info'), yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
+        info = ydl.extract_info(video['url'], download=False)
+    video_data = video_data_from_info(info)
+    
+    track = select_subtitle_track(video_data, preferred_langs)
+    asr_stats = None
+    if track:
+        transcript_data = fetch_subtitle_transcript(track['url'], track['auto_captions'], track['ext'])
+        language = f"{track['lang']} ({track['type_desc']})"
+    elif asr_available():
+        transcript_data, language, asr_stats = transcribe_video(video['url'])
+    else:
+        raise LookupError("لا توجد نصوص متاحة")
+    if not transcript_data:
+        raise ValueError("فشل في تحليل محتوى النص")
+    
+    # حساب خالص: في مجمع العمليات حتى لا يحجز GIL عن الجلسات والمهام الأخرى
+    with stage('analysis', segments=len(transcript_data)):
+        analysis = run_in_process(analyze_text, transcript_data.full_text)
+    result = {
+        'transcript_data': transcript_data,
+        'language': language,
+        'video_info': video_data['video_info'],
+        'analysis': analysis,
+        'asr': asr_stats
+    }
+    with stage('cache_store'):
+        get_transcript_cache().set(video['id'], dict(result, transcript_data=transcript_data.to_list()), track_key)
+    return result
+
+# دالة معالجة دفعة من الفيديوهات بخيوط عمل محدودة
+def run_batch(videos, max_workers=BATCH_MAX_WORKERS, on_progress=None, preferred_langs=()):
+    """تشغيل process_batch_video على كل الفيديوهات بالتوازي وإرجاع سجل لكل فيديو بترتيب الإدخال
+    
+    on_progress(index, record) تُستدعى من الخيط المستدعي فور انتهاء كل فيديو.
+    """
+    records = [None] * len(videos)
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {}
+        for index, video in enumerate(videos):
+            futures[executor.submit(process_batch_video, video, preferred_langs)] = (index, time.time())
+        
+        for future in as_completed(futures):
+            index, started = futures[future]
+            video = videos[index]
+            record = {'id': video['id'], 'title': video['title'], 'url': video['url']}
+            try:
+                result = future.result()
+                record.update(
+                    status='ok',
+                    language=result['language'],
+                    cached=result['cached'],
+                    transcript_data=result['transcript_data'],
+                    video_info=result['video_info']
+                )
+                if result['video_info']:
+                    record['title'] = result['video_info']['title']
+            except Exception as e:
+                record.update(status='error', error=str(e))
+            record['seconds'] = round(time.time() - started, 2)
+            
+            records[index] = record
+            if on_progress:
+                on_progress(index, record)
+    except BaseException:
+        # إعادة تشغيل الواجهة أو مقاطعة المستخدم من on_progress: لا تنتظر بقية الفيديوهات
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    
+    return records
+
+# دالة توليد نتائج الدفعة كأسطر JSONL
+def iter_batch_jsonl(records):
+    """سطر JSON لكل فيديو: المعرف والعنوان واللغة والمقاطع، أو سبب الفشل"""
+    for record in records:
+        row = {'video_id': record['id'], 'title': record['title'], 'url': record['url'], 'status': record['status']}
+        if record['status'] == 'ok':
+            row['language'] = record['language']
+            row['segments'] = record['transcript_data'].to_list()
+        else:
+            row['error'] = record['error']
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+# إعدادات المهام الخلفية: خيوط للمهام الشبكية وعمليات للتحليل الثقيل الذي يحجز GIL
+JOB_MAX_WORKERS = int(os.environ.get('TRANSCRIPT_JOB_WORKERS', 4))
+JOB_PROCESS_WORKERS = int(os.environ.get('TRANSCRIPT_JOB_PROCESSES', 2))
+JOB_RETENTION_SECONDS = 3600
+
+# أولويات المهام (الأصغر أولاً)
+JOB_PRIORITY_HIGH = 0
+JOB_PRIORITY_NORMAL = 5
+JOB_PRIORITY_LOW = 10
+
+# حالات المهمة التي لم تنته بعد
+JOB_ACTIVE_STATES = ('queued', 'running')
+
+# مهمة خلفية واحدة
+class Job:
+    """حالة مهمة ورسائل تقدمها ونتيجتها؛ record تعمل كـ on_progress للدالة المنفذة"""
+    
+    def __init__(self, kind, priority):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.priority = priority
+        self.status = 'queued'
+        self.messages = []
+        self.partial = {}
+        self.trace = None
+        self.call = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+    
+    def record(self, kind, message):
+        # الرسائل الدائمة تُحفظ بالترتيب، وسطر الحالة والمعاينة والتقدم تُستبدل بآخر قيمة
+        if kind in ('status', 'preview', 'progress'):
+            self.partial[kind] = message
+        elif kind == 'clear':
+            self.partial = {}
+        elif kind == 'trace':
+            self.trace = message
+        else:
+            self.messages.append((kind, message))
+    
+    def snapshot(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'priority': self.priority,
+            'status': self.status,
+            'messages': list(self.messages),
+            'partial': dict(self.partial),
+            'trace': self.trace,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+
+# طابور المهام الخلفية المشترك بين الجلسات
+class JobQueue:
+    """طابور أولويات بعدد محدود من خيوط العمل؛ submit ترجع معرف المهمة وget حالتها للاستطلاع
+    
+    المهام تعمل خارج خيط سكربت Streamlit، فإعادة تشغيل الصفحة لا تلغيها.
+    """
+    
+    def __init__(self, max_workers=JOB_MAX_WORKERS):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.workers = []
+        for number in range(max(1, max_workers)):
+            worker = threading.Thread(target=self.work, name=f"transcript-job-{number}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+    
+    def submit(self, kind, fn, *args, priority=JOB_PRIORITY_NORMAL, progress=False, **kwargs):
+        """جدولة fn(*args, **kwargs)؛ progress=True يمرر on_progress لتسجيل رسائل التقدم في المهمة"""
+        job = Job(kind, priority)
+        if progress:
+            kwargs['on_progress'] = job.record
+        job.call = (fn, args, kwargs)
+        
+        with self.lock:
+            self.prune()
+            self.jobs[job.id] = job
+        self.queue.put((priority, next(self.sequence), job.id))
+        get_metrics().increment('transcript_jobs_total', kind=kind)
+        return job.id
+    
+    def get(self, job_id):
+        """لقطة من حالة المهمة (مع موقعها في الطابور) أو None إن لم تعد موجودة"""
+        with self.lock:
+            self.prune()
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = job.snapshot()
+            if job.status == 'queued':
+                snapshot['position'] = 1 + sum(
+                    1 for other in self.jobs.values()
+                    if other.status == 'queued' and (other.priority, other.created) < (job.priority, job.created)
+                )
+            return snapshot
+    
+    def forget(self, job_id):
+        """حذف مهمة منتهية بعد أن استلمت الجلسة نتيجتها، فلا تبقى النتيجة في الذاكرة حتى انتهاء الاحتفاظ"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in JOB_ACTIVE_STATES:
+                return False
+            del self.jobs[job_id]
+            return True
+    
+    def cancel(self, job_id):
+        """إلغاء مهمة لم تبدأ بعد؛ المهمة الجارية تكمل عملها"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != 'queued':
+                return False
+            job.status = 'cancelled'
+            job.finished = time.time()
+            return True
+    
+    def stats(self):
+        with self.lock:
+            return dict(Counter(job.status for job in self.jobs.values()))
+    
+    def prune(self):
+        # حذف المهام المنتهية القديمة (يُستدعى داخل القفل)
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < cutoff]:
+            del self.jobs[job_id]
+    
+    def work(self):
+        while True:
+            _, _, job_id = self.queue.get()
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None or job.status != 'queued':
+                    continue
+                job.status = 'running'
+                job.started = time.time()
+            
+            get_metrics().observe('stage', 'job_queue_wait', job.started - job.created)
+            fn, args, kwargs = job.call
+            try:
+                with stage(f"job_{job.kind}"):
+                    result = fn(*args, **kwargs)
+                with self.lock:
+                    job.result, job.status = result, 'done'
+            except Exception as e:
+                with self.lock:
+                    job.error, job.status = str(e), 'error'
+            finally:
+                job.call = None
+                job.finished = time.time()
+
+# دالة الحصول على طابور المهام المشترك
+@lru_cache(maxsize=None)
+def get_job_queue():
+    return JobQueue()
+
+# دالة الحصول على مجمع العمليات للتحليل الثقيل
+@lru_cache(maxsize=None)
+def get_process_pool():
+    """spawn بدلاً من fork: العملية الأم تحمل خيوطاً (الخادم والمهام) لا يصح نسخها"""
+    import multiprocessing
+    import site
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # Streamlit يضيف مجلد التطبيق إلى sys.path أثناء تشغيل السكربت فقط، فتضيفه العمليات بنفسها
+    return ProcessPoolExecutor(
+        max_workers=JOB_PROCESS_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=site.addsitedir,
+        initargs=(os.path.dirname(os.path.abspath(__file__)),)
+    )
+
+# دالة تشغيل دالة تحليل في عملية منفصلة
+def run_in_process(fn, *args):
+    """fn(*args) في مجمع العمليات حتى لا يحجز الحساب GIL عن الجلسات الأخرى؛
+    تُنفذ محلياً إن كانت العمليات معطلة (TRANSCRIPT_JOB_PROCESSES=0) أو تعطل المجمع"""
+    if JOB_PROCESS_WORKERS <= 0:
+        return fn(*args)
+    
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        return get_process_pool().submit(fn, *args).result()
+    except BrokenProcessPool:
+        get_process_pool.cache_clear()
+        return fn(*args)